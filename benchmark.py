@@ -0,0 +1,543 @@
+"""
+benchmark.py
+Benchmark do pipeline de análise com latência por estágio
+
+Reproduz um corpus fixo de dataset/raw (pasta de frames ou vídeo) e mede:
+- Latência p50/p95/p99 de cada estágio (leitura, conversão de cor, YOLO, OCR,
+  trackers, estrategista, emissão para a UI)
+- FPS sustentado do AnalysisEngine processando o corpus inteiro
+- Pico de memória (RSS)
+- Opcional (--sizes): precisão x latência do CardDetector em cada resolução de
+  inferência, contra os rótulos YOLO (.txt ao lado dos frames) ou, sem rótulos,
+  contra a maior resolução
+
+O relatório JSON é estável (mesmas chaves, ordem fixa) para ser comparado entre commits.
+
+Uso:
+    python benchmark.py                                        # sessão padrão do dataset
+    python benchmark.py dataset/raw/video_jogo1 --frames 300 --output bench.json
+    python benchmark.py --compare bench_antes.json             # diferença para um relatório anterior
+    python benchmark.py dataset/raw/video_jogo1 --sizes 320 416 640  # precisão x latência por resolução
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import analysis_engine
+from analysis_engine import (
+    AnalysisEngine, CardDetector, StrategicAdvisor, CAPTURE_ROIS, MODEL_PATH, get_elixir_cost,
+)
+from elixir_tracker import ElixirTracker
+from game_window import roi_to_pixels
+from inference_backend import INFERENCE_SIZES
+from ocr_backend import get_ocr_backend
+from replay_source import ReplaySource
+from yolo_detector import YOLODetector
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_CORPUS = BASE_DIR / "dataset" / "raw" / "session_20251221_193015"
+DEFAULT_FRAMES = 100
+DEFAULT_WARMUP = 3
+REPORT_VERSION = 1
+PERCENTILES = (50, 95, 99)
+IOU_MATCH = 0.5        # IoU mínimo para uma detecção contar como acerto
+SIZES_CONFIDENCE = 0.25  # Limiar de confiança na comparação entre resoluções
+
+# Ordem fixa dos estágios no relatório
+STAGES = (
+    'capture',           # Leitura/decodificação do frame gravado
+    'color_convert',     # BGRA -> BGR (mesma conversão do ScreenCapture)
+    'card_detector',     # analysis_engine.CardDetector
+    'yolo_detector',     # yolo_detector.YOLODetector
+    'elixir_ocr_engine', # analysis_engine.ElixirOCR
+    'elixir_ocr_module', # ocr_elixir.ElixirOCR
+    'elixir_tracker',    # ElixirTracker.update
+    'advisor',           # StrategicAdvisor.get_advanced_advice
+    'ui_emit',           # Signals.update_ui.emit (Qt)
+)
+
+
+class StageTimer:
+    """Acumula amostras de latência (ms) por estágio"""
+
+    def __init__(self):
+        self.samples = {}
+        self.enabled = True
+
+    def measure(self, stage, func, *args, **kwargs):
+        """Executa func e registra o tempo gasto (se habilitado)"""
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        if self.enabled:
+            self.samples.setdefault(stage, []).append((time.perf_counter() - start) * 1000.0)
+        return result
+
+    def summary(self):
+        """Estatísticas por estágio, na ordem de STAGES"""
+        ordered = [s for s in STAGES if s in self.samples] + [s for s in self.samples if s not in STAGES]
+        return {stage: summarize(self.samples[stage]) for stage in ordered}
+
+
+def summarize(samples_ms):
+    """count/mean/p50/p95/p99/max (ms) de uma lista de amostras"""
+    values = np.asarray(samples_ms, dtype=np.float64)
+    if values.size == 0:
+        return {'count': 0}
+
+    stats = {'count': int(values.size), 'mean_ms': round(float(values.mean()), 3)}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f'p{p}_ms'] = round(float(v), 3)
+    stats['max_ms'] = round(float(values.max()), 3)
+    return stats
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo em MB (None se não der para medir)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta em KB, macOS em bytes
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        # Windows: peak_wset; demais: RSS atual como aproximação
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def git_commit():
+    """Commit atual (abreviado) para identificar o relatório"""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+# ==== ESTÁGIOS ISOLADOS ====
+
+def _setup_components(model_path, skipped):
+    """Cria os componentes medidos; os indisponíveis vão para skipped com o motivo"""
+    components = {}
+
+    card_detector = CardDetector(model_path)
+    if card_detector.model is not None:
+        components['card_detector'] = card_detector
+    else:
+        skipped['card_detector'] = f"modelo não carregado ({model_path})"
+
+    yolo = YOLODetector(str(model_path))
+    if yolo.model is not None:
+        components['yolo_detector'] = yolo
+    else:
+        skipped['yolo_detector'] = f"modelo não carregado ({model_path})"
+
+    try:
+        get_ocr_backend()
+        from ocr_elixir import ElixirOCR as ModuleElixirOCR
+        components['elixir_ocr_engine'] = analysis_engine.ElixirOCR
+        components['elixir_ocr_module'] = ModuleElixirOCR()
+    except RuntimeError as e:
+        skipped['elixir_ocr_engine'] = skipped['elixir_ocr_module'] = str(e)
+
+    try:
+        from main import Signals
+        signals = Signals()
+        signals.update_ui.connect(lambda data: None)
+        components['ui_emit'] = signals
+    except ImportError as e:
+        skipped['ui_emit'] = f"PyQt6 indisponível ({e})"
+
+    return components
+
+
+def run_stage_benchmark(corpus, frames, warmup, model_path):
+    """
+    Mede cada estágio isoladamente, frame a frame
+
+    Returns:
+        tuple: (StageTimer, dict estágio -> motivo de ter sido pulado, frames medidos)
+    """
+    skipped = {}
+    components = _setup_components(model_path, skipped)
+    tracker = ElixirTracker()
+    advisor = StrategicAdvisor()
+    timer = StageTimer()
+
+    source = ReplaySource(corpus, mode='max', max_frames=frames + warmup)
+    iterator = source._iter_frames()
+    bgr = None
+    measured = 0
+
+    for index in range(frames + warmup):
+        timer.enabled = index >= warmup
+
+        item = timer.measure('capture', next, iterator, None)
+        if item is None:
+            break
+        frame, timestamp = item
+        h, w = frame.shape[:2]
+
+        # Conversão que o ScreenCapture faz no frame BGRA do mss (destino pré-alocado)
+        bgra = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+        if bgr is None or bgr.shape != frame.shape:
+            bgr = np.empty_like(frame)
+        timer.measure('color_convert', cv2.cvtColor, bgra, cv2.COLOR_BGRA2BGR, dst=bgr)
+
+        detected = []
+        if 'card_detector' in components:
+            y1, y2, x1, x2 = roi_to_pixels(CAPTURE_ROIS['opponent_arena'], w, h)
+            detected = timer.measure('card_detector', components['card_detector'].detect, frame[y1:y2, x1:x2])
+        if 'yolo_detector' in components:
+            timer.measure('yolo_detector', components['yolo_detector'].detect, frame)
+
+        my_elixir = 10
+        if 'elixir_ocr_engine' in components:
+            my_elixir = timer.measure('elixir_ocr_engine', components['elixir_ocr_engine'].extract_elixir, frame)
+            timer.measure('elixir_ocr_module', components['elixir_ocr_module'].extract_both, frame)
+
+        cards = [dict(card, elixir=get_elixir_cost(card['name'])) for card in detected]
+        opponent_elixir = timer.measure('elixir_tracker', tracker.update, cards, timestamp=timestamp)
+
+        game_state = {
+            'myElixir': my_elixir,
+            'opponentElixir': opponent_elixir,
+            'myTowers': 3,
+            'opponentTowers': 3,
+            'priority': 'low',
+        }
+        # match_started/cards_detected forçam o caminho completo do estrategista
+        advice = timer.measure(
+            'advisor', advisor.get_advanced_advice,
+            game_state, cards[:4], my_elixir - opponent_elixir, True, 3,
+        )
+
+        if 'ui_emit' in components:
+            ui_data = dict(game_state, suggestion=advice.get('advice', ''), recentPlays=tracker.get_recent_plays(5))
+            timer.measure('ui_emit', components['ui_emit'].update_ui.emit, ui_data)
+
+        if timer.enabled:
+            measured += 1
+
+    return timer, skipped, measured
+
+
+# ==== PIPELINE COMPLETO ====
+
+def run_pipeline_benchmark(corpus, frames, model_path):
+    """
+    Roda o AnalysisEngine sobre o corpus (fonte em modo 'max', sem descartes)
+
+    Returns:
+        dict: frames, segundos, FPS sustentado e latência de process_frame
+    """
+    engine = AnalysisEngine(source=ReplaySource(corpus, mode='max', max_frames=frames), model_path=model_path)
+    latencies = []
+    process_frame = engine.process_frame
+
+    def timed_process_frame(frame):
+        start = time.perf_counter()
+        try:
+            return process_frame(frame)
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    engine.process_frame = timed_process_frame
+
+    start = time.perf_counter()
+    for _ in engine.results(idle_sleep=0.001):
+        pass
+    elapsed = time.perf_counter() - start
+
+    return {
+        'frames': len(latencies),
+        'seconds': round(elapsed, 3),
+        'fps': round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        'process_frame': summarize(latencies),
+    }
+
+
+# ==== RESOLUÇÃO DE INFERÊNCIA ====
+
+def load_yolo_labels(image_path, width, height):
+    """
+    Rótulos YOLO (classe cx cy w h normalizados) do .txt com o mesmo nome do frame
+
+    Returns:
+        (class_ids, xyxy em pixels) ou None se não houver rótulo
+    """
+    label_path = Path(image_path).with_suffix(".txt")
+    if not label_path.exists():
+        return None
+
+    rows = np.loadtxt(label_path, ndmin=2, dtype=np.float32)
+    if rows.size == 0:
+        return np.empty(0, np.int32), np.empty((0, 4), np.float32)
+
+    cx, cy, bw, bh = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    xyxy = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+    return rows[:, 0].astype(np.int32), xyxy
+
+
+def box_iou(a, b):
+    """IoU entre todas as caixas de a (N, 4) e b (M, 4) -> (N, M)"""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(br - tl, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def match_detections(detections, true_ids, true_boxes, iou_threshold=IOU_MATCH):
+    """
+    Pareamento guloso (maior confiança primeiro) por classe e IoU
+
+    Returns:
+        (acertos, falsos positivos, não detectados, soma do IoU dos acertos)
+    """
+    order = np.argsort(-detections['confidence'])
+    pred_ids = detections['class_id'][order]
+    pred_boxes = detections['bbox'][order]
+    if len(pred_ids) == 0 or len(true_ids) == 0:
+        return 0, len(pred_ids), len(true_ids), 0.0
+
+    iou = box_iou(pred_boxes, true_boxes)
+    iou[pred_ids[:, None] != true_ids[None, :]] = 0.0
+    matched = np.zeros(len(true_ids), dtype=bool)
+    hits, iou_sum = 0, 0.0
+    for row in iou:
+        row = np.where(matched, 0.0, row)
+        best = int(row.argmax())
+        if row[best] >= iou_threshold:
+            matched[best] = True
+            hits += 1
+            iou_sum += float(row[best])
+    return hits, len(pred_ids) - hits, len(true_ids) - hits, iou_sum
+
+
+def _iter_labeled_frames(source):
+    """(frame, rótulos ou None) na ordem do corpus"""
+    if source.is_video:
+        for frame, _ in source._iter_frames():
+            yield frame, None
+        return
+
+    for path in source.files[::source.step]:
+        frame = cv2.imread(str(path))
+        if frame is None:
+            continue
+        h, w = frame.shape[:2]
+        yield frame, load_yolo_labels(path, w, h)
+
+
+def run_resolution_benchmark(corpus, frames, warmup, model_path, sizes):
+    """
+    Mesmo modelo em cada resolução de entrada: latência e precisão/recall
+
+    Referência: rótulos YOLO ao lado dos frames quando existirem (frame inteiro),
+    senão as detecções da maior resolução.
+
+    Returns:
+        dict com a referência usada e as estatísticas por resolução
+    """
+    sizes = sorted(set(sizes), reverse=True)
+    detectors = {}
+    for size in sizes:
+        detector = CardDetector(model_path, imgsz=size)
+        if detector.model is None:
+            return {'skipped': f"modelo não carregado ({model_path})"}
+        detectors[size] = detector
+
+    latencies = {size: [] for size in sizes}
+    counts = {size: [0, 0, 0, 0.0] for size in sizes}  # acertos, falsos positivos, perdidos, soma IoU
+    reference = None
+    measured = 0
+
+    source = ReplaySource(corpus, mode='max')
+    for index, (frame, labels) in enumerate(_iter_labeled_frames(source)):
+        if index >= frames + warmup:
+            break
+        if reference is None:
+            reference = 'labels' if labels is not None else f'{sizes[0]}px'
+
+        outputs = {}
+        for size, detector in detectors.items():
+            start = time.perf_counter()
+            outputs[size] = detector.detect_array(frame, SIZES_CONFIDENCE)
+            if index >= warmup:
+                latencies[size].append((time.perf_counter() - start) * 1000.0)
+        if index < warmup:
+            continue
+
+        if reference == 'labels':
+            if labels is None:
+                continue  # Frame sem rótulo no meio de um corpus rotulado
+            true_ids, true_boxes = labels
+        else:
+            true_ids, true_boxes = outputs[sizes[0]]['class_id'], outputs[sizes[0]]['bbox']
+
+        for size in sizes:
+            for slot, value in enumerate(match_detections(outputs[size], true_ids, true_boxes)):
+                counts[size][slot] += value
+        measured += 1
+
+    results = {}
+    for size in sizes:
+        hits, false_pos, missed, iou_sum = counts[size]
+        precision = hits / (hits + false_pos) if hits + false_pos else None
+        recall = hits / (hits + missed) if hits + missed else None
+        f1 = (2 * precision * recall / (precision + recall)) if precision and recall else None
+        results[str(size)] = {
+            'latency': summarize(latencies[size]),
+            'precision': round(precision, 4) if precision is not None else None,
+            'recall': round(recall, 4) if recall is not None else None,
+            'f1': round(f1, 4) if f1 is not None else None,
+            'mean_iou': round(iou_sum / hits, 4) if hits else None,
+            'backend': detectors[size].model.name,
+        }
+
+    return {'reference': reference, 'frames': measured, 'confidence': SIZES_CONFIDENCE, 'sizes': results}
+
+
+def print_resolution_report(resolution):
+    if 'skipped' in resolution:
+        print(f"\n🔍 Resolução de inferência: ⏭️ pulado: {resolution['skipped']}")
+        return
+
+    def fmt(value):
+        return f"{value:.3f}" if value is not None else "  n/a"
+
+    print("\n" + "=" * 72)
+    print(f"🔍 RESOLUÇÃO DE INFERÊNCIA (referência: {resolution['reference']}, {resolution['frames']} frames)")
+    print("=" * 72)
+    print(f"{'Tamanho':<10}{'p50 ms':>10}{'p95 ms':>10}{'precisão':>11}{'recall':>9}{'F1':>8}{'IoU':>8}")
+    for size, stats in resolution['sizes'].items():
+        latency = stats['latency']
+        if not latency.get('count'):
+            continue
+        print(f"{size + 'px':<10}{latency['p50_ms']:>10.2f}{latency['p95_ms']:>10.2f}"
+              f"{fmt(stats['precision']):>11}{fmt(stats['recall']):>9}{fmt(stats['f1']):>8}{fmt(stats['mean_iou']):>8}")
+
+
+# ==== RELATÓRIO ====
+
+def build_report(corpus, frames, warmup, model_path, sizes=None):
+    timer, skipped, measured = run_stage_benchmark(corpus, frames, warmup, model_path)
+    pipeline = run_pipeline_benchmark(corpus, frames, model_path)
+
+    report = {
+        'version': REPORT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': str(corpus),
+        'model': str(model_path),
+        'frames': measured,
+        'warmup': warmup,
+        'stages': timer.summary(),
+        'skipped': skipped,
+        'pipeline': pipeline,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    if sizes:
+        report['resolution'] = run_resolution_benchmark(corpus, frames, warmup, model_path, sizes)
+        report['peak_rss_mb'] = peak_rss_mb()
+    return report
+
+
+def print_report(report):
+    print("\n" + "=" * 72)
+    print(f"📊 BENCHMARK - {report['corpus']} ({report['frames']} frames, commit {report['commit']})")
+    print("=" * 72)
+    print(f"{'Estágio':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'máx ms':>10}{'n':>8}")
+    for stage, stats in report['stages'].items():
+        if not stats.get('count'):
+            continue
+        print(f"{stage:<20}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}{stats['count']:>8}")
+    for stage, reason in report['skipped'].items():
+        print(f"{stage:<20}  ⏭️ pulado: {reason}")
+
+    pipeline = report['pipeline']
+    pf = pipeline['process_frame']
+    print("-" * 72)
+    print(f"🚀 Pipeline: {pipeline['fps']:.1f} FPS sustentado ({pipeline['frames']} frames em {pipeline['seconds']:.2f}s)")
+    if pf.get('count'):
+        print(f"   process_frame p50/p95/p99: {pf['p50_ms']:.2f} / {pf['p95_ms']:.2f} / {pf['p99_ms']:.2f} ms")
+    if report['peak_rss_mb'] is not None:
+        print(f"💾 Pico de memória: {report['peak_rss_mb']:.1f} MB")
+    if 'resolution' in report:
+        print_resolution_report(report['resolution'])
+
+
+def print_comparison(old, new):
+    """Diferença de p50/p95 por estágio e de FPS entre dois relatórios"""
+    def delta(a, b):
+        if not a:
+            return "    n/a"
+        return f"{(b - a) / a * 100:+6.1f}%"
+
+    print("\n" + "=" * 72)
+    print(f"🔍 COMPARAÇÃO: {old.get('commit')} -> {new.get('commit')}")
+    print("=" * 72)
+    print(f"{'Estágio':<20}{'p50 antes':>11}{'p50 agora':>11}{'Δ':>9}{'p95 antes':>11}{'p95 agora':>11}{'Δ':>9}")
+    for stage, stats in new['stages'].items():
+        before = old.get('stages', {}).get(stage)
+        if not before or not before.get('count') or not stats.get('count'):
+            continue
+        print(f"{stage:<20}{before['p50_ms']:>11.2f}{stats['p50_ms']:>11.2f}{delta(before['p50_ms'], stats['p50_ms']):>9}"
+              f"{before['p95_ms']:>11.2f}{stats['p95_ms']:>11.2f}{delta(before['p95_ms'], stats['p95_ms']):>9}")
+
+    old_fps = old.get('pipeline', {}).get('fps', 0)
+    new_fps = new['pipeline']['fps']
+    print(f"\n🚀 FPS: {old_fps:.1f} -> {new_fps:.1f} ({delta(old_fps, new_fps).strip()})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de análise de frames")
+    parser.add_argument("corpus", nargs="?", default=str(DEFAULT_CORPUS), help="Pasta de frames ou vídeo")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="Frames medidos")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Frames descartados no início")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Pesos YOLO")
+    parser.add_argument("--output", default="bench_report.json", help="Relatório JSON")
+    parser.add_argument("--compare", default=None, help="Relatório anterior para comparar")
+    parser.add_argument("--sizes", type=int, nargs="*", default=None,
+                        help=f"Resoluções de inferência comparadas (sem valores: {' '.join(map(str, INFERENCE_SIZES))})")
+    args = parser.parse_args()
+
+    sizes = None
+    if args.sizes is not None:
+        sizes = args.sizes or list(INFERENCE_SIZES)
+    report = build_report(Path(args.corpus), args.frames, args.warmup, Path(args.model), sizes)
+    print_report(report)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Relatório salvo em {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+cards_db.py
+Banco de cartas único e indexado, compartilhado por todos os módulos
+
+Carrega cards_db.json uma vez e monta índices imutáveis com busca O(1) por:
+- nome exato e nome sem diferenciar maiúsculas
+- apelido/grafia alternativa ("PEKKA" = "P.E.K.K.A", "Log" = "The Log")
+- class id do YOLO, tipo e custo de elixir
+
+Uso:
+    from cards_db import get_cards_db
+    db = get_cards_db()
+    db.get('PEKKA')          # mesmo registro de 'P.E.K.K.A'
+    db.elixir_cost('Log')    # 2
+    db.by_type('spell')      # tupla de cartas
+
+O índice montado é salvo em cards_db.cache (pickle) junto com mtime, tamanho e
+SHA-256 do JSON e um hash de CARD_ALIASES/CLASS_ID_TO_CARD. Nas próximas
+execuções o cache é usado enquanto nada disso mudar; qualquer alteração
+(ex.: update_cards_db.py ou um apelido novo) faz o cache ser refeito.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+from collections.abc import Mapping
+from pathlib import Path
+from threading import Lock
+from types import MappingProxyType
+
+BASE_DIR = Path(__file__).resolve().parent
+CARDS_DB_PATH = BASE_DIR / "cards_db.json"
+CACHE_SUFFIX = ".cache"  # cards_db.json -> cards_db.cache
+CACHE_VERSION = 1        # Incrementar quando o formato do índice mudar
+
+# ==== MAPEAMENTO CLASS_ID -> CARTA (modelo YOLO) ====
+CLASS_ID_TO_CARD = MappingProxyType({
+    0: 'Knight', 1: 'Archers', 2: 'Giant', 3: 'Fireball',
+    4: 'Arrows', 5: 'Inferno Tower', 6: 'PEKKA', 7: 'Mini PEKKA',
+    8: 'Prince', 9: 'Wizard', 10: 'Musketeer', 11: 'Hog Rider',
+    12: 'Valkyrie', 13: 'Zap', 14: 'Lightning', 15: 'Rocket',
+    16: 'Cannon', 17: 'Tesla',
+})
+
+# Apelidos -> nome oficial. Pontuação/espaços/maiúsculas já são ignorados
+# na comparação ("PEKKA" == "P.E.K.K.A"), então aqui ficam só nomes diferentes.
+CARD_ALIASES = {
+    'Log': 'The Log',
+    '3 Musketeers': 'Three Musketeers',
+    '3M': 'Three Musketeers',
+    'Skarmy': 'Skeleton Army',
+    'Barb Barrel': 'Barbarian Barrel',
+    'Barbs': 'Barbarians',
+    'E-Barbs': 'Elite Barbarians',
+    'E-Wiz': 'Electro Wizard',
+    'E-Giant': 'Electro Giant',
+    'E-Dragon': 'Electro Dragon',
+    'Collector': 'Elixir Collector',
+    'Pump': 'Elixir Collector',
+    'Inferno': 'Inferno Tower',
+    'MK': 'Mega Knight',
+    'Hog': 'Hog Rider',
+    'Snowball': 'Giant Snowball',
+    'Mini Pekka': 'Mini P.E.K.K.A',
+}
+
+# Banco padrão quando cards_db.json não existe ou é inválido
+DEFAULT_CARDS = {
+    # Tropas
+    'Knight': {'elixir': 3, 'type': 'melee', 'counters': ['Mini PEKKA', 'Prince'], 'weakness': ['Swarm']},
+    'Archers': {'elixir': 3, 'type': 'ranged', 'counters': ['Valkyrie', 'Knight'], 'weakness': ['Arrows', 'Log']},
+    'Giant': {'elixir': 5, 'type': 'tank', 'counters': ['Mini PEKKA', 'Inferno Tower'], 'weakness': ['PEKKA']},
+    'PEKKA': {'elixir': 7, 'type': 'tank', 'counters': ['Giant', 'Golem'], 'weakness': ['Swarm', 'Inferno']},
+    'Mini PEKKA': {'elixir': 4, 'type': 'melee', 'counters': ['Giant', 'Knight'], 'weakness': ['Swarm']},
+    'Prince': {'elixir': 5, 'type': 'melee', 'counters': ['Wizard', 'Musketeer'], 'weakness': ['Swarm']},
+    'Wizard': {'elixir': 5, 'type': 'ranged', 'counters': ['Swarm', 'Witch'], 'weakness': ['Lightning']},
+    'Musketeer': {'elixir': 4, 'type': 'ranged', 'counters': ['Balloon', 'Baby Dragon'], 'weakness': ['Fireball']},
+    'Hog Rider': {'elixir': 4, 'type': 'melee', 'counters': ['Buildings'], 'weakness': ['Cannon', 'Tesla']},
+    'Valkyrie': {'elixir': 4, 'type': 'melee', 'counters': ['Swarm', 'Witch'], 'weakness': ['Mini PEKKA']},
+
+    # Feitiços
+    'Fireball': {'elixir': 4, 'type': 'spell', 'counters': ['Musketeer', 'Wizard', '3 Musketeers'], 'weakness': []},
+    'Arrows': {'elixir': 2, 'type': 'spell', 'counters': ['Minions', 'Skeleton Army'], 'weakness': []},
+    'Zap': {'elixir': 2, 'type': 'spell', 'counters': ['Inferno', 'Sparky'], 'weakness': []},
+    'Lightning': {'elixir': 6, 'type': 'spell', 'counters': ['3 Musketeers', 'Sparky'], 'weakness': []},
+    'Rocket': {'elixir': 6, 'type': 'spell', 'counters': ['Elixir Collector', 'Towers'], 'weakness': []},
+
+    # Construções
+    'Inferno Tower': {'elixir': 5, 'type': 'building', 'counters': ['Tanks'], 'weakness': ['Zap', 'Swarm']},
+    'Cannon': {'elixir': 3, 'type': 'building', 'counters': ['Hog Rider', 'Giant'], 'weakness': ['Fireball']},
+    'Tesla': {'elixir': 4, 'type': 'building', 'counters': ['Hog Rider', 'Balloon'], 'weakness': ['Lightning']},
+}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name):
+    """Chave de comparação: sem maiúsculas, espaços e pontuação ("P.E.K.K.A" -> "pekka")"""
+    return _NON_ALNUM.sub("", str(name).casefold())
+
+
+def _thaw(value):
+    """Inverso de _freeze (para serializar no cache)"""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _freeze(value):
+    """Listas/dicts do JSON viram tuplas/mappings somente leitura"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class CardIndex(Mapping):
+    """
+    Banco de cartas imutável com índices
+
+    Funciona como um dict nome -> carta (somente leitura), mas a busca aceita
+    qualquer grafia conhecida do nome: exata, sem maiúsculas ou apelido.
+    """
+
+    def __init__(self, cards, aliases=CARD_ALIASES, class_ids=CLASS_ID_TO_CARD, source=None):
+        """
+        Args:
+            cards: Lista de dicts de carta (cada um com 'name')
+            aliases: Apelido -> nome oficial
+            class_ids: Class id do YOLO -> nome da carta
+            source: Origem dos dados (caminho do JSON ou None para o banco padrão)
+        """
+        self.source = source
+
+        by_name = {}
+        for card in cards:
+            name = card.get('name') or card.get('card') or card.get('id')
+            if not name:
+                continue
+            record = dict(card)
+            record['name'] = name
+            by_name[name] = _freeze(record)
+
+        self._build(by_name, aliases, class_ids)
+
+    def _build(self, by_name, aliases, class_ids):
+        by_key = {}
+        by_type = {}
+        by_elixir = {}
+        for name, card in by_name.items():
+            by_key.setdefault(normalize_name(name), card)
+            by_type.setdefault(str(card.get('type', '')).casefold(), []).append(card)
+            by_elixir.setdefault(card.get('elixir', 0), []).append(card)
+
+        # Apelidos só entram se o alvo existir e não colidirem com um nome real
+        for alias, target in aliases.items():
+            card = by_key.get(normalize_name(target))
+            if card is not None:
+                by_key.setdefault(normalize_name(alias), card)
+
+        by_class_id = {}
+        for class_id, name in class_ids.items():
+            card = by_name.get(name) or by_key.get(normalize_name(name))
+            if card is not None:
+                by_class_id[class_id] = card
+
+        self._by_name = MappingProxyType(by_name)
+        self._by_key = MappingProxyType(by_key)
+        self._by_type = MappingProxyType({k: tuple(v) for k, v in by_type.items()})
+        self._by_elixir = MappingProxyType({k: tuple(v) for k, v in by_elixir.items()})
+        self._by_class_id = MappingProxyType(by_class_id)
+        self._class_ids = MappingProxyType(dict(class_ids))
+        self._aliases = MappingProxyType(dict(aliases))
+
+    # ---- Serialização (cache) ----
+
+    def __getstate__(self):
+        # Só dados simples: os índices são remontados por nome no __setstate__
+        return {
+            'source': self.source,
+            'cards': [_thaw(card) for card in self._by_name.values()],
+            'keys': {key: card['name'] for key, card in self._by_key.items()},
+            'aliases': dict(self._aliases),
+            'class_ids': dict(self._class_ids),
+        }
+
+    def __setstate__(self, state):
+        self.source = state['source']
+        by_name = {card['name']: _freeze(card) for card in state['cards']}
+        self._build(by_name, state['aliases'], state['class_ids'])
+        # Mantém exatamente as chaves salvas (inclusive colisões já resolvidas)
+        self._by_key = MappingProxyType({key: by_name[name] for key, name in state['keys'].items()})
+
+    # ---- Mapping (nome -> carta) ----
+
+    def __getitem__(self, name):
+        card = self.get_card(name)
+        if card is None:
+            raise KeyError(name)
+        return card
+
+    def __iter__(self):
+        return iter(self._by_name)
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __contains__(self, name):
+        return self.get_card(name) is not None
+
+    def __repr__(self):
+        return f"<CardIndex {len(self)} cartas de {self.source or 'banco padrão'}>"
+
+    # ---- Buscas ----
+
+    def get_card(self, name):
+        """Carta pelo nome em qualquer grafia conhecida (None se não existir)"""
+        if not isinstance(name, str):
+            return None
+        card = self._by_name.get(name)
+        if card is None:
+            card = self._by_key.get(normalize_name(name))
+        return card
+
+    def canonical_name(self, name):
+        """Nome oficial da carta (o próprio nome se não for encontrada)"""
+        card = self.get_card(name)
+        return card['name'] if card is not None else name
+
+    def elixir_cost(self, name):
+        """Custo de elixir (0 se a carta não existir)"""
+        card = self.get_card(name)
+        return card.get('elixir', 0) if card is not None else 0
+
+    def by_class_id(self, class_id):
+        """Carta do class id do YOLO (None se não mapeada)"""
+        return self._by_class_id.get(class_id)
+
+    def name_by_class_id(self, class_id):
+        """Nome da carta do class id, como no modelo ('Unknown_<id>' se não mapeado)"""
+        return self._class_ids.get(class_id, f"Unknown_{class_id}")
+
+    def by_type(self, card_type):
+        """Cartas de um tipo (sem diferenciar maiúsculas)"""
+        return self._by_type.get(str(card_type).casefold(), ())
+
+    def by_elixir(self, cost):
+        """Cartas com o custo de elixir informado"""
+        return self._by_elixir.get(cost, ())
+
+    @property
+    def types(self):
+        return tuple(self._by_type)
+
+
+def cache_path_for(path):
+    """Arquivo de cache do JSON informado (cards_db.json -> cards_db.cache)"""
+    return Path(path).with_suffix(CACHE_SUFFIX)
+
+
+def _parse_cards_json(raw, path):
+    data = json.loads(raw)
+    if isinstance(data, dict) and "cards" in data:
+        cards_list = data["cards"]
+    elif isinstance(data, list):
+        cards_list = data
+    else:
+        cards_list = []
+    return CardIndex([c for c in cards_list if isinstance(c, dict)], source=str(path))
+
+
+def _tables_digest():
+    """Hash dos apelidos e class ids embutidos no índice (entram na chave do cache)"""
+    tables = json.dumps(
+        [sorted(CARD_ALIASES.items()), sorted(CLASS_ID_TO_CARD.items())], ensure_ascii=False
+    )
+    return hashlib.sha256(tables.encode("utf-8")).hexdigest()
+
+
+def _read_cache(cache_path, path, stat):
+    """
+    Índice do cache se ainda corresponder ao JSON
+
+    Returns:
+        (index, header): index None se o cache não existir ou estiver velho;
+        header é None se o cache não puder ser lido
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            header = pickle.load(f)
+            if header.get('version') != CACHE_VERSION or header.get('source') != str(path):
+                return None, None
+            if header.get('tables') != _tables_digest():
+                return None, None  # Apelidos/class ids mudaram: o índice salvo está velho
+
+            # mtime + tamanho iguais: confia sem ler o JSON
+            if header.get('mtime_ns') == stat.st_mtime_ns and header.get('size') == stat.st_size:
+                return pickle.load(f), header
+            return None, header
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError, KeyError, ValueError):
+        return None, None
+
+
+def _load_cached_index(cache_path):
+    with open(cache_path, "rb") as f:
+        pickle.load(f)  # cabeçalho
+        return pickle.load(f)
+
+
+def _write_cache(cache_path, path, stat, digest, index):
+    header = {
+        'version': CACHE_VERSION,
+        'source': str(path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': digest,
+        'tables': _tables_digest(),
+    }
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except (OSError, pickle.PicklingError) as e:
+        print(f"⚠️ Não foi possível gravar o cache de cartas: {e}")
+
+
+def load_cards_db(path=CARDS_DB_PATH, use_cache=True):
+    """
+    Lê cards_db.json ({"cards": [...]} ou lista) e monta o índice
+
+    Args:
+        path: Arquivo JSON
+        use_cache: Usa/atualiza o cache binário ao lado do JSON
+
+    Returns:
+        CardIndex (banco padrão se o arquivo não existir ou for inválido)
+    """
+    path = Path(path)
+    if path.exists():
+        try:
+            stat = path.stat()
+            cache_path = cache_path_for(path)
+            header = None
+            if use_cache:
+                index, header = _read_cache(cache_path, path, stat)
+                if index is not None:
+                    print(f"✅ {len(index)} cartas carregadas do cache")
+                    return index
+
+            raw = path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+
+            # Só o mtime mudou (ex.: arquivo copiado/tocado): conteúdo igual, reaproveita
+            index = None
+            if header is not None and header.get('sha256') == digest:
+                try:
+                    index = _load_cached_index(cache_path)
+                except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError, KeyError, ValueError):
+                    index = None
+            if index is None:
+                index = _parse_cards_json(raw, path)
+
+            if len(index):
+                if use_cache:
+                    _write_cache(cache_path, path, stat, digest, index)
+                print(f"✅ {len(index)} cartas carregadas do banco de dados")
+                return index
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar {path.name}: {e}")
+
+    print("⚠️ Usando banco de dados padrão")
+    return CardIndex([dict(card, name=name) for name, card in DEFAULT_CARDS.items()])
+
+
+def rebuild_cards_cache(path=CARDS_DB_PATH):
+    """
+    Refaz o cache a partir do JSON e descarta o índice compartilhado
+    (chamado por update_cards_db.py depois de gravar o arquivo)
+    """
+    global _cards_db
+    path = Path(path)
+    try:
+        cache_path_for(path).unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"⚠️ Não foi possível remover o cache de cartas: {e}")
+
+    index = load_cards_db(path)
+    if path.resolve() == CARDS_DB_PATH:
+        with _cards_db_lock:
+            _cards_db = index
+    return index
+
+
+_cards_db = None
+_cards_db_lock = Lock()
+
+
+def get_cards_db():
+    """Índice compartilhado do processo (carregado no primeiro acesso)"""
+    global _cards_db
+    with _cards_db_lock:
+        if _cards_db is None:
+            _cards_db = load_cards_db()
+        return _cards_db
+
+
+class _LazyCardIndex(Mapping):
+    """
+    Referência ao índice compartilhado que só carrega no primeiro uso
+
+    Permite manter CARDS_DB no nível do módulo sem ler nada no import.
+    """
+
+    def __getitem__(self, name):
+        return get_cards_db()[name]
+
+    def __iter__(self):
+        return iter(get_cards_db())
+
+    def __len__(self):
+        return len(get_cards_db())
+
+    def __contains__(self, name):
+        return name in get_cards_db()
+
+    def __getattr__(self, attr):
+        return getattr(get_cards_db(), attr)
+
+    def __repr__(self):
+        return repr(get_cards_db())
+
+
+CARDS_DB = _LazyCardIndex()
+
+
+def get_card_name_by_id(class_id):
+    """Retorna nome da carta pelo ID"""
+    return get_cards_db().name_by_class_id(class_id)
+
+
+def get_elixir_cost(card_name):
+    """Retorna custo de elixir da carta"""
+    return get_cards_db().elixir_cost(card_name)
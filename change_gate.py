@@ -0,0 +1,101 @@
+"""
+change_gate.py
+Detector barato de mudança por ROI: pula YOLO/OCR quando a região não mudou
+"""
+
+import time
+from threading import Lock
+
+import numpy as np
+
+from lazy_imports import get_cv2
+
+SIGNATURE_SIZE = (32, 32)  # ROI reduzida usada na comparação
+CHANGE_THRESHOLD = 3.0     # Diferença absoluta média (0-255) para considerar mudança
+MAX_REUSE_AGE = 5.0        # Segundos máximos reaproveitando o mesmo resultado
+
+
+class RoiChangeGate:
+    """Reaproveita o último resultado de cada ROI enquanto ela não muda"""
+
+    def __init__(self, threshold=CHANGE_THRESHOLD, max_age=MAX_REUSE_AGE, size=SIGNATURE_SIZE):
+        """
+        Args:
+            threshold: Diferença absoluta média mínima para reprocessar
+            max_age: Força reprocessamento após esse tempo (segundos), mesmo sem mudança
+            size: Tamanho da assinatura reduzida (largura, altura)
+        """
+        self.threshold = threshold
+        self.max_age = max_age
+        self.size = size
+        self._entries = {}  # chave -> (assinatura, resultado, timestamp)
+        self._stats = {}    # chave -> [total, pulados]
+        self._lock = Lock()
+
+    def run(self, key, roi, compute):
+        """
+        Retorna o resultado em cache se a ROI não mudou, senão chama compute()
+
+        Args:
+            key: Nome da ROI (ex.: 'opponent_arena')
+            roi: Recorte atual da ROI
+            compute: Função sem argumentos que calcula o resultado
+        """
+        signature = self.signature(roi)
+        now = time.monotonic()
+
+        with self._lock:
+            stats = self._stats.setdefault(key, [0, 0])
+            stats[0] += 1
+
+            entry = self._entries.get(key)
+            if (entry is not None and signature is not None
+                    and now - entry[2] < self.max_age
+                    and self.difference(signature, entry[0]) < self.threshold):
+                stats[1] += 1
+                return entry[1]
+
+        result = compute()
+
+        if signature is not None:
+            with self._lock:
+                self._entries[key] = (signature, result, now)
+        return result
+
+    def signature(self, roi):
+        """Assinatura reduzida em escala de cinza (float32)"""
+        cv2 = get_cv2()
+        if roi is None or roi.size == 0:
+            return None
+        small = cv2.resize(roi, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.float32)
+
+    @staticmethod
+    def difference(sig_a, sig_b):
+        """Diferença absoluta média entre duas assinaturas"""
+        cv2 = get_cv2()
+        return float(cv2.absdiff(sig_a, sig_b).mean())
+
+    def get_stats(self):
+        """Taxas de reaproveitamento por ROI"""
+        with self._lock:
+            return {
+                key: {
+                    'total': total,
+                    'skipped': skipped,
+                    'skip_rate': round(skipped / total, 3) if total else 0.0,
+                }
+                for key, (total, skipped) in self._stats.items()
+            }
+
+    def reset(self):
+        """Descarta resultados em cache (estatísticas são mantidas)"""
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        """Zera as estatísticas"""
+        with self._lock:
+            self._stats.clear()
@@ -5,8 +5,11 @@ Rastreia o deck completo do oponente (8 cartas) e gerencia o ciclo de cartas
 
 import json
 from datetime import datetime
+from pathlib import Path
 from typing import List, Dict, Optional
 
+from cards_db import CARDS_DB_PATH, get_cards_db, load_cards_db
+
 class DeckTracker:
     def __init__(self, cards_db_path: str = "cards_db.json"):
         """
@@ -20,9 +23,11 @@ class DeckTracker:
         self.deck_complete: bool = False
         self.max_deck_size: int = 8
         
-        # Carrega database de cartas
-        with open(cards_db_path, 'r', encoding='utf-8') as f:
-            self.cards_db = json.load(f)
+        # Banco de cartas indexado (compartilhado se for o cards_db.json padrão)
+        if Path(cards_db_path).resolve() == CARDS_DB_PATH:
+            self.cards_db = get_cards_db()
+        else:
+            self.cards_db = load_cards_db(cards_db_path)
         
         print("🎯 Deck Tracker iniciado!")
     
@@ -189,11 +194,9 @@ class DeckTracker:
         return any(c['name'] == card_name for c in self.cards_known)
     
     def _get_card_info(self, card_name: str) -> Optional[Dict]:
-        """Busca informações de uma carta no database"""
-        for card in self.cards_db:
-            if card['name'].lower() == card_name.lower():
-                return card
-        return None
+        """Busca informações de uma carta no database (nome, sem maiúsculas ou apelido)"""
+        card = self.cards_db.get_card(card_name)
+        return dict(card) if card is not None else None
     
     def _print_deck(self):
         """Imprime o deck completo formatado"""
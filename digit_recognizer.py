@@ -0,0 +1,244 @@
+"""
+digit_recognizer.py
+Reconhecedor de elixir (0-10) por template matching - caminho rápido sem Tesseract
+
+O número de elixir usa sempre a mesma fonte, então basta comparar a ROI
+normalizada com um template por valor (correlação cruzada normalizada).
+Os templates são gerados por auto-calibração a partir dos frames de dataset/raw,
+usando o OCR lento apenas para rotular as amostras. Cada template guarda a
+região de onde veio (ex.: 'my_elixir' do ocr_elixir, 'engine_elixir' do motor):
+recortes diferentes enquadram o número de forma diferente, então cada leitor só
+compara com os templates do próprio recorte.
+
+Uso (calibração):
+    python digit_recognizer.py dataset/raw/session_20251221_193015 --limit 500
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from lazy_imports import get_cv2
+
+BASE_DIR = Path(__file__).resolve().parent
+TEMPLATES_PATH = BASE_DIR / "elixir_digits.npz"
+
+TEMPLATE_SIZE = (24, 32)  # (largura, altura) da ROI normalizada
+MIN_SCORE = 0.80          # Correlação mínima para confiar no resultado
+MIN_MARGIN = 0.05         # Diferença mínima para o segundo colocado
+MIN_SAMPLES = 3           # Amostras mínimas por valor na calibração
+OUTLIER_SCORE = 0.60      # Amostras menos parecidas que isso com a média são descartadas
+
+
+class DigitTemplateRecognizer:
+    """Classifica a ROI do elixir por correlação com templates 0-10"""
+
+    def __init__(self, labels, templates, regions=None):
+        """
+        Args:
+            labels: Array (N,) com o valor de cada template
+            templates: Array (N, D) com templates já normalizados (média 0, norma 1)
+            regions: Array (N,) com a região de origem de cada template (None = sem região)
+        """
+        self.labels = np.asarray(labels, dtype=np.int32)
+        self.templates = np.asarray(templates, dtype=np.float32)
+        self.regions = np.asarray([''] * len(self.labels) if regions is None else regions, dtype=str)
+
+        # (labels, templates) por região, montados uma vez
+        self._by_region = {}
+        for region in np.unique(self.regions):
+            mask = self.regions == region
+            self._by_region[str(region)] = (self.labels[mask], self.templates[mask])
+
+    @classmethod
+    def load(cls, path=TEMPLATES_PATH):
+        """Carrega templates salvos (retorna None se não existir)"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            data = np.load(path)
+            if 'regions' not in data.files:
+                print("⚠️ Templates de dígitos sem região: recalibre com digit_recognizer.py")
+                return None
+            return cls(data['labels'], data['templates'], data['regions'])
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar templates de dígitos: {e}")
+            return None
+
+    def save(self, path=TEMPLATES_PATH):
+        """Salva templates em .npz"""
+        np.savez_compressed(path, labels=self.labels, templates=self.templates, regions=self.regions)
+        print(f"💾 Templates salvos em {path}")
+
+    def recognize(self, roi, region):
+        """
+        Classifica a ROI
+
+        Args:
+            roi: Recorte BGR ou em escala de cinza com o número de elixir
+            region: Região do recorte (só os templates calibrados nela são usados)
+
+        Returns:
+            tuple: (valor ou None, confiança 0-1)
+                   Confiança 0 quando a ROI é vazia, a região não foi calibrada
+                   ou o resultado é ambíguo entre dois valores.
+        """
+        labels, templates = self._by_region.get(region, (None, None))
+        if labels is None:
+            return None, 0.0
+
+        vector = normalize_roi(roi)
+        if vector is None:
+            return None, 0.0
+
+        scores = templates @ vector
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        second = float(scores[order[1]]) if len(order) > 1 else -1.0
+
+        if best - second < MIN_MARGIN:
+            return int(labels[order[0]]), 0.0
+        return int(labels[order[0]]), max(0.0, best)
+
+    def is_confident(self, confidence):
+        """True se a confiança dispensa o OCR"""
+        return confidence >= MIN_SCORE
+
+
+def normalize_roi(roi):
+    """Converte a ROI em vetor de média 0 e norma 1 (None se ROI vazia/uniforme)"""
+    cv2 = get_cv2()
+    if roi is None or roi.size == 0:
+        return None
+
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+    small = cv2.resize(gray, TEMPLATE_SIZE, interpolation=cv2.INTER_AREA)
+
+    vector = small.astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    if norm < 1e-6:
+        return None
+    return vector / norm
+
+
+_default_recognizer = None
+_default_loaded = False
+
+
+def get_default_recognizer():
+    """Reconhecedor compartilhado carregado de TEMPLATES_PATH (None se não calibrado)"""
+    global _default_recognizer, _default_loaded
+    if not _default_loaded:
+        _default_recognizer = DigitTemplateRecognizer.load()
+        _default_loaded = True
+        if _default_recognizer is not None:
+            print(f"✅ Reconhecedor de dígitos: {len(_default_recognizer.labels)} templates "
+                  f"({', '.join(sorted(_default_recognizer._by_region))})")
+    return _default_recognizer
+
+
+# ==== AUTO-CALIBRAÇÃO ====
+
+def iter_frames(directories, limit=None):
+    """Lê frames PNG/JPG das pastas (ordenados pelo nome)"""
+    cv2 = get_cv2()
+    count = 0
+    for directory in directories:
+        for path in sorted(Path(directory).glob("*.png")) + sorted(Path(directory).glob("*.jpg")):
+            frame = cv2.imread(str(path))
+            if frame is None:
+                continue
+            yield frame
+            count += 1
+            if limit and count >= limit:
+                return
+
+
+def iter_regions(frame, ocr):
+    """Recortes (região, ROI) de cada leitor de elixir que usa os templates"""
+    from analysis_engine import ElixirOCR as EngineElixirOCR
+
+    for key in ocr.regions:
+        yield key, ocr._crop_roi(frame, key)
+
+    y1, y2, x1, x2 = EngineElixirOCR.default_region(frame)
+    roi = frame[y1:y2, x1:x2]
+    yield EngineElixirOCR.REGION_KEY, roi if roi.size > 0 else None
+
+
+def calibrate(directories, limit=None):
+    """
+    Gera templates por região rotulando ROIs do dataset com o OCR lento
+
+    Returns:
+        DigitTemplateRecognizer ou None se não houver amostras suficientes
+    """
+    from ocr_elixir import ElixirOCR
+
+    ocr = ElixirOCR(recognizer=False)
+    samples = {}
+
+    for frame in iter_frames(directories, limit):
+        for region, roi in iter_regions(frame, ocr):
+            binary = ocr._preprocess(roi)
+            vector = normalize_roi(roi)
+            if binary is None or vector is None:
+                continue
+
+            digits = ''.join(filter(str.isdigit, ocr.backend.read_digits(binary)))
+            if not digits or not 0 <= int(digits) <= 10:
+                continue
+            samples.setdefault((region, int(digits)), []).append(vector)
+
+    labels, templates, regions = [], [], []
+    for region, value in sorted(samples):
+        vectors = np.stack(samples[region, value])
+
+        # Remove rótulos errados do OCR: amostras longe da média da classe
+        mean = _unit(vectors.mean(axis=0))
+        vectors = vectors[vectors @ mean >= OUTLIER_SCORE]
+
+        if len(vectors) < MIN_SAMPLES:
+            print(f"⚠️ {region} = {value}: amostras insuficientes ({len(vectors)})")
+            continue
+
+        labels.append(value)
+        templates.append(_unit(vectors.mean(axis=0)))
+        regions.append(region)
+        print(f"📊 {region} = {value}: {len(vectors)} amostras")
+
+    if not labels:
+        return None
+    return DigitTemplateRecognizer(labels, np.stack(templates), regions)
+
+
+def _unit(vector):
+    """Recentraliza e normaliza um template médio"""
+    vector = vector - vector.mean()
+    return vector / max(np.linalg.norm(vector), 1e-6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibra templates do reconhecedor de elixir")
+    parser.add_argument("dirs", nargs="*", default=[str(BASE_DIR / "dataset" / "raw" / "session_20251221_193015")])
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de frames lidos")
+    parser.add_argument("--output", default=str(TEMPLATES_PATH))
+    args = parser.parse_args()
+
+    print("🎯 Calibrando reconhecedor de dígitos...")
+    recognizer = calibrate(args.dirs, args.limit)
+    if recognizer is None:
+        print("❌ Nenhum template gerado - verifique as regiões em ocr_elixir.py e analysis_engine.py")
+        return
+
+    recognizer.save(args.output)
+    for region in sorted(set(recognizer.regions.tolist())):
+        values = recognizer.labels[recognizer.regions == region].tolist()
+        print(f"✅ {region}: valores calibrados {values}")
+
+
+if __name__ == "__main__":
+    main()
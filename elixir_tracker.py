@@ -37,21 +37,24 @@ class ElixirTracker:
         self.total_elixir_spent = 0
         self.play_count = 0
         
-    def update(self, detected_cards):
+    def update(self, detected_cards, precise=False, timestamp=None):
         """
         Atualiza elixir baseado em cartas detectadas
         
         Args:
             detected_cards: Lista de cartas detectadas [{'name': str, 'elixir': int, 'confidence': float}]
+            precise: Retorna valor fracionário (uma casa decimal) em vez de inteiro
+            timestamp: Instante do frame (epoch). None = agora (time.time())
             
         Returns:
-            int: Elixir estimado do oponente
+            int (ou float se precise): Elixir estimado do oponente
         """
         with self.lock:
-            current_time = time.time()
+            current_time = time.time() if timestamp is None else timestamp
             
             # 1. REGENERAÇÃO AUTOMÁTICA
-            time_elapsed = current_time - self.last_update_time
+            # (frames fora de ordem ou de outra sessão não regeneram nem "desregeneram")
+            time_elapsed = max(0.0, current_time - self.last_update_time)
             regen_rate = self.DOUBLE_ELIXIR_RATE if self.double_elixir_mode else self.REGEN_RATE
             elixir_regenerated = time_elapsed * regen_rate
             
@@ -88,6 +91,8 @@ class ElixirTracker:
             self.opponent_elixir = min(self.ELIXIR_MAX, self.opponent_elixir)
             
             # 4. Retorna elixir estimado (mínimo 0 para display)
+            if precise:
+                return round(max(0.0, self.opponent_elixir), 1)
             return max(0, int(round(self.opponent_elixir)))
     
     def _is_duplicate_detection(self, card_name, current_time):
@@ -146,14 +151,18 @@ class ElixirTracker:
         with self.lock:
             self.double_elixir_mode = False
     
-    def check_double_elixir_time(self):
+    def check_double_elixir_time(self, timestamp=None):
         """
         Verifica se já passou 2 minutos de partida (elixir duplo)
         
+        Args:
+            timestamp: Instante do frame (epoch). None = último frame processado
+        
         Returns:
             bool: True se deve ativar elixir duplo
         """
-        match_duration = time.time() - self.match_start_time
+        now = self.last_update_time if timestamp is None else timestamp
+        match_duration = now - self.match_start_time
         
         # Elixir duplo começa aos 2 minutos (120 segundos)
         if match_duration >= 120 and not self.double_elixir_mode:
@@ -180,6 +189,11 @@ class ElixirTracker:
         with self.lock:
             return self.total_elixir_spent
     
+    def get_precise_elixir(self):
+        """Retorna elixir estimado do oponente com uma casa decimal (sem regenerar)"""
+        with self.lock:
+            return round(max(0.0, self.opponent_elixir), 1)
+    
     def get_average_cost_per_play(self):
         """Retorna custo médio por jogada"""
         with self.lock:
@@ -195,7 +209,8 @@ class ElixirTracker:
             dict: Estatísticas do tracker
         """
         with self.lock:
-            match_duration = time.time() - self.match_start_time
+            # Tempo de partida no relógio dos frames (não no do processamento)
+            match_duration = self.last_update_time - self.match_start_time
             
             return {
                 'current_elixir': max(0, int(round(self.opponent_elixir))),
@@ -207,12 +222,18 @@ class ElixirTracker:
                 'recent_plays': self.get_recent_plays(5)
             }
     
-    def reset(self):
-        """Reseta o tracker para nova partida"""
+    def reset(self, timestamp=None):
+        """
+        Reseta o tracker para nova partida
+        
+        Args:
+            timestamp: Instante de início da partida (epoch). None = agora
+        """
         with self.lock:
+            now = time.time() if timestamp is None else timestamp
             self.opponent_elixir = self.ELIXIR_START
-            self.last_update_time = time.time()
-            self.match_start_time = time.time()
+            self.last_update_time = now
+            self.match_start_time = now
             self.double_elixir_mode = False
             
             self.recent_plays.clear()
@@ -0,0 +1,22 @@
+"""
+frame_buffer.py
+Frame com timestamp (TimedFrame) para fontes que informam o instante de captura
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+class TimedFrame(NamedTuple):
+    """Frame com o instante de captura (epoch, segundos) e número de sequência"""
+    image: np.ndarray
+    timestamp: float
+    seq: int
+
+
+def unwrap_frame(frame):
+    """Separa (imagem, timestamp) aceitando TimedFrame ou ndarray puro (timestamp None)"""
+    if isinstance(frame, TimedFrame):
+        return frame.image, frame.timestamp
+    return frame, None
@@ -0,0 +1,294 @@
+"""
+frame_bus.py
+Barramento de frames em memória compartilhada: um produtor (ScreenCapture) e
+vários leitores, no mesmo processo ou em outros processos, sem copiar frames
+
+O bloco tem um cabeçalho, os metadados de cada slot e os slots de imagem.
+Cada slot tem um contador no estilo seqlock: o produtor o deixa ímpar enquanto
+escreve e par ao terminar. O leitor confere o contador antes e depois de ler;
+se mudou (ou estava ímpar), o frame foi sobrescrito no meio e a leitura é
+refeita. Depois de publicar, o produtor grava no cabeçalho o slot e a
+sequência do frame mais recente.
+
+Leitores de outros processos usam read() (cópia consistente) ou peek() +
+is_valid() (view sem cópia, validada depois do uso). No processo do produtor,
+lease_latest()/release() emprestam o slot: o produtor não escreve em slot
+emprestado, então a view continua válida até ser devolvida.
+
+Uso (outro processo):
+    bus = SharedFrameBus.attach(capture.frame_bus.name)
+    frame = bus.read(after_seq=last_seq)   # TimedFrame ou None
+"""
+
+import time
+from multiprocessing import shared_memory
+from threading import Lock
+
+import numpy as np
+
+from frame_buffer import TimedFrame
+
+FRAME_BUS_SLOTS = 8      # Slots do anel (frames em uso + margem até sobrescrever)
+READ_RETRIES = 100       # Tentativas de leitura consistente antes de desistir
+
+_MAGIC = 0x46524D42      # "FRMB"
+_VERSION = 1
+_ALIGN = 64
+
+# Cabeçalho (int64)
+_H_MAGIC, _H_VERSION, _H_SLOTS, _H_HEIGHT, _H_WIDTH, _H_CHANNELS, _H_LATEST_INDEX, _H_LATEST_SEQ = range(8)
+_HEADER_FIELDS = 8
+
+# Metadados por slot: (seqlock, seq do frame) em int64 + timestamp em float64
+_S_LOCK, _S_SEQ = range(2)
+_SLOT_FIELDS = 2
+
+
+def _align(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(slots, frame_nbytes):
+    """Offsets (metadados, timestamps, dados) e tamanho total do bloco"""
+    meta_offset = _align(_HEADER_FIELDS * 8)
+    ts_offset = _align(meta_offset + slots * _SLOT_FIELDS * 8)
+    data_offset = _align(ts_offset + slots * 8)
+    stride = _align(frame_nbytes)
+    return meta_offset, ts_offset, data_offset, stride, data_offset + slots * stride
+
+
+class SharedFrameBus:
+    """Anel de frames BGR em memória compartilhada com leitura tipo seqlock"""
+
+    def __init__(self, shape, slots=FRAME_BUS_SLOTS, name=None, create=True):
+        """
+        Args:
+            shape: (altura, largura, canais) dos frames (fixo durante a vida do bloco)
+            slots: Quantidade de slots
+            name: Nome do bloco (None = gerado pelo sistema)
+            create: True cria o bloco (produtor); use attach() para leitores
+        """
+        if create:
+            if len(shape) != 3:
+                raise ValueError(f"Shape de frame inválido: {shape} (use altura, largura, canais)")
+            self.slots = max(2, int(slots))
+            self.shape = tuple(int(v) for v in shape)
+            size = _layout(self.slots, int(np.prod(self.shape)))[-1]
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self.owner = create
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+
+        if create:
+            self._header[:] = (_MAGIC, _VERSION, self.slots, *self.shape, -1, 0)
+        else:
+            if self._header[_H_MAGIC] != _MAGIC or self._header[_H_VERSION] != _VERSION:
+                self._header = None
+                self.shm.close()
+                raise ValueError(f"Bloco '{name}' não é um barramento de frames")
+            self.slots = int(self._header[_H_SLOTS])
+            self.shape = tuple(int(v) for v in self._header[_H_HEIGHT:_H_CHANNELS + 1])
+
+        frame_nbytes = int(np.prod(self.shape))
+        meta_offset, ts_offset, data_offset, stride, _ = _layout(self.slots, frame_nbytes)
+        buf = self.shm.buf
+        self._meta = np.ndarray((self.slots, _SLOT_FIELDS), dtype=np.int64, buffer=buf, offset=meta_offset)
+        self._timestamps = np.ndarray((self.slots,), dtype=np.float64, buffer=buf, offset=ts_offset)
+        # Uma view fixa por slot: release() reconhece o frame pelo id do array
+        self._views = [
+            np.ndarray(self.shape, dtype=np.uint8, buffer=buf, offset=data_offset + i * stride)
+            for i in range(self.slots)
+        ]
+        self._index_by_id = {id(view): i for i, view in enumerate(self._views)}
+
+        # Estado do produtor (só no processo dono)
+        self._lock = Lock()
+        self._leases = [0] * self.slots
+        self._writing = None
+        self._next = 0
+        self._seq = 0
+
+        # Estatísticas
+        self.published = 0
+        self.overruns = 0  # Publicações perdidas porque todos os slots estavam emprestados
+        self.retries = 0   # Leituras refeitas porque o slot foi sobrescrito no meio
+
+    @classmethod
+    def attach(cls, name):
+        """Abre um barramento existente como leitor"""
+        return cls(None, name=name, create=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # ---- Produtor ----
+
+    def begin_write(self):
+        """
+        Reserva o próximo slot livre para escrita
+
+        Returns:
+            (índice, view) ou None se todos os slots estiverem emprestados
+        """
+        with self._lock:
+            if self._writing is not None:
+                raise RuntimeError("Escrita anterior não foi publicada nem cancelada")
+            latest = int(self._header[_H_LATEST_INDEX])
+            for _ in range(self.slots):
+                index = self._next
+                self._next = (self._next + 1) % self.slots
+                # Nunca sobrescreve o frame mais recente nem um slot emprestado
+                if index != latest and self._leases[index] == 0:
+                    self._meta[index, _S_LOCK] += 1  # Ímpar: escrita em andamento
+                    self._writing = index
+                    return index, self._views[index]
+            self.overruns += 1
+            return None
+
+    def commit(self, index, timestamp=None):
+        """Publica o slot escrito como frame mais recente e retorna a sequência"""
+        with self._lock:
+            if index != self._writing:
+                raise RuntimeError(f"Slot {index} não está reservado para escrita")
+            self._seq += 1
+            self._meta[index, _S_SEQ] = self._seq
+            self._timestamps[index] = time.time() if timestamp is None else timestamp
+            self._meta[index, _S_LOCK] += 1  # Par: slot consistente
+            self._header[_H_LATEST_INDEX] = index
+            self._header[_H_LATEST_SEQ] = self._seq
+            self._writing = None
+            self.published += 1
+            return self._seq
+
+    def cancel(self, index):
+        """Desiste da escrita (o slot volta a ser livre, com conteúdo inválido)"""
+        with self._lock:
+            if index != self._writing:
+                return
+            self._meta[index, _S_SEQ] = 0
+            self._meta[index, _S_LOCK] += 1
+            self._writing = None
+
+    def lease_latest(self, after_seq=0):
+        """
+        Empresta o frame mais recente (sem cópia) - só no processo do produtor
+
+        Returns:
+            TimedFrame com view do slot (devolver com release) ou None se não há frame mais novo que after_seq
+        """
+        with self._lock:
+            index = int(self._header[_H_LATEST_INDEX])
+            if index < 0:
+                return None
+            seq = int(self._meta[index, _S_SEQ])
+            if seq <= after_seq:
+                return None
+            self._leases[index] += 1
+            return TimedFrame(self._views[index], float(self._timestamps[index]), seq)
+
+    def release(self, image):
+        """Devolve um frame emprestado (ignora arrays que não são slots do barramento)"""
+        index = self._index_by_id.get(id(image))
+        if index is None:
+            return
+        with self._lock:
+            if self._leases[index] > 0:
+                self._leases[index] -= 1
+
+    def in_use(self):
+        """Slots emprestados no processo do produtor"""
+        with self._lock:
+            return sum(1 for lease in self._leases if lease > 0)
+
+    # ---- Leitores (qualquer processo) ----
+
+    def latest_seq(self):
+        """Sequência do frame mais recente (0 = nenhum publicado)"""
+        return int(self._header[_H_LATEST_SEQ])
+
+    def peek(self, after_seq=0):
+        """
+        View do frame mais recente, sem cópia e sem empréstimo
+
+        O produtor pode sobrescrever o slot a qualquer momento: confira com
+        is_valid(frame) depois de usar a imagem e descarte o resultado se falhar.
+
+        Returns:
+            TimedFrame ou None se não há frame consistente mais novo que after_seq
+        """
+        for _ in range(READ_RETRIES):
+            index = int(self._header[_H_LATEST_INDEX])
+            if index < 0:
+                return None
+            lock = int(self._meta[index, _S_LOCK])
+            seq = int(self._meta[index, _S_SEQ])
+            timestamp = float(self._timestamps[index])
+            if lock % 2 == 0 and int(self._meta[index, _S_LOCK]) == lock:
+                if seq <= after_seq:
+                    return None
+                return TimedFrame(self._views[index], timestamp, seq)
+            self.retries += 1
+        return None
+
+    def is_valid(self, frame):
+        """True se o slot do frame ainda contém aquele frame (sem escrita em andamento)"""
+        index = self._index_by_id.get(id(frame.image))
+        if index is None:
+            return False
+        return self._meta[index, _S_LOCK] % 2 == 0 and int(self._meta[index, _S_SEQ]) == frame.seq
+
+    def read(self, out=None, after_seq=0):
+        """
+        Cópia consistente do frame mais recente
+
+        Args:
+            out: Array de destino reaproveitado (shape do barramento); None aloca
+            after_seq: Só retorna frames com sequência maior
+
+        Returns:
+            TimedFrame (imagem = out) ou None
+        """
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        for _ in range(READ_RETRIES):
+            frame = self.peek(after_seq)
+            if frame is None:
+                return None
+            np.copyto(out, frame.image)
+            if self.is_valid(frame):
+                return TimedFrame(out, frame.timestamp, frame.seq)
+            self.retries += 1
+        return None
+
+    def get_stats(self):
+        return {
+            'slots': self.slots,
+            'shape': self.shape,
+            'latest_seq': self.latest_seq(),
+            'published': self.published,
+            'in_use': self.in_use() if self.owner else None,
+            'overruns': self.overruns,
+            'retries': self.retries,
+        }
+
+    def close(self):
+        """Fecha o bloco (o dono também o remove do sistema)"""
+        if self.shm is None:
+            return
+        # Views precisam ser soltas antes do close() da memória compartilhada
+        self._header = self._meta = self._timestamps = None
+        self._views = []
+        self._index_by_id = {}
+        if self.owner:
+            try:
+                self.shm.unlink()  # Leitores já conectados continuam lendo até fechar
+            except FileNotFoundError:
+                pass
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Frame ainda referenciado fora daqui: o mapeamento some com ele
+        self.shm = None
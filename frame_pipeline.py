@@ -0,0 +1,292 @@
+"""
+frame_pipeline.py
+Pipeline de análise de frames com número fixo de workers
+Backpressure "último frame vence": frames antigos são descartados, nunca enfileirados
+
+StageGraph roda os estágios independentes de um mesmo frame (YOLO, OCR, ...)
+em paralelo num executor compartilhado: a latência do frame passa a ser a do
+estágio mais lento, não a soma.
+"""
+
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Condition, Lock
+
+STAGE_WORKERS = 3  # Threads do executor de estágios (compartilhado por todos os frames)
+
+
+class FrameWorkerPool:
+    """Pool persistente de workers que processa sempre o frame mais recente"""
+
+    def __init__(self, handler, num_workers=1, release=None, name="FrameWorker"):
+        """
+        Inicializa o pool
+
+        Args:
+            handler: Função chamada com cada frame (roda nas threads do pool)
+            num_workers: Quantidade de frames processados em paralelo
+            release: Callback opcional chamado quando o frame não é mais usado
+                     (processado ou descartado)
+            name: Prefixo do nome das threads
+        """
+        self.handler = handler
+        self.num_workers = max(1, int(num_workers))
+        self.release = release
+        self.name = name
+
+        self._cond = Condition()
+        self._pending = None  # Slot único: só o frame mais recente espera
+        self._running = False
+        self._threads = []
+
+        # Contadores
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.last_latency = 0.0
+
+    @property
+    def is_running(self):
+        return self._running
+
+    def start(self):
+        """Inicia as threads do pool"""
+        with self._cond:
+            if self._running:
+                return False
+            self._running = True
+            self._threads = [
+                Thread(target=self._worker, daemon=True, name=f"{self.name}-{i}")
+                for i in range(self.num_workers)
+            ]
+
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self, timeout=2.0):
+        """Para o pool e descarta o frame pendente"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            pending = self._pending
+            self._pending = None
+            self._cond.notify_all()
+
+        if pending is not None:
+            self._release(pending[0])
+
+        for thread in self._threads:
+            thread.join(timeout)
+            if thread.is_alive():
+                print(f"⚠️ {thread.name} não terminou no tempo esperado")
+        self._threads = []
+
+    def set_num_workers(self, num_workers):
+        """Altera o nível de concorrência (reinicia o pool se estiver rodando)"""
+        num_workers = max(1, int(num_workers))
+        if num_workers == self.num_workers:
+            return
+
+        was_running = self._running
+        if was_running:
+            self.stop()
+        self.num_workers = num_workers
+        if was_running:
+            self.start()
+
+    def submit(self, frame):
+        """
+        Entrega um frame para análise
+
+        Se já existe um frame esperando, ele é descartado e substituído.
+
+        Returns:
+            bool: True se nenhum frame foi descartado
+        """
+        with self._cond:
+            if not self._running:
+                stale = frame
+                replaced = False
+            else:
+                stale = self._pending[0] if self._pending is not None else None
+                replaced = stale is not None
+                self._pending = (frame, time.perf_counter())
+                self.submitted += 1
+                if replaced:
+                    self.dropped += 1
+                self._cond.notify()
+
+        if stale is not None:
+            self._release(stale)
+        return not replaced
+
+    def wait_for_worker(self, timeout=None):
+        """
+        Espera até haver worker livre e nenhum frame pendente
+
+        Returns:
+            bool: True se há worker livre; False no timeout ou com o pool parado
+        """
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: not self._running or (self._pending is None and self.in_flight < self.num_workers),
+                timeout
+            )
+            return ready and self._running
+
+    def is_busy(self):
+        """True se todos os workers estão ocupados"""
+        with self._cond:
+            return self.in_flight >= self.num_workers
+
+    def get_stats(self):
+        """Retorna contadores do pool"""
+        with self._cond:
+            return {
+                'workers': self.num_workers,
+                'submitted': self.submitted,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'in_flight': self.in_flight,
+                'pending': 1 if self._pending is not None else 0,
+                'last_latency_ms': round(self.last_latency * 1000, 1)
+            }
+
+    def reset_stats(self):
+        """Zera os contadores"""
+        with self._cond:
+            self.submitted = 0
+            self.processed = 0
+            self.dropped = 0
+            self.errors = 0
+            self.last_latency = 0.0
+
+    def _worker(self):
+        """Loop de cada worker"""
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+
+                if not self._running:
+                    return
+
+                frame, submitted_at = self._pending
+                self._pending = None
+                self.in_flight += 1
+
+            try:
+                self.handler(frame)
+            except Exception as e:
+                print(f"❌ Erro no {self.name}: {e}")
+                traceback.print_exc()
+                with self._cond:
+                    self.errors += 1
+            finally:
+                self._release(frame)
+                with self._cond:
+                    self.in_flight -= 1
+                    self.processed += 1
+                    self.last_latency = time.perf_counter() - submitted_at
+                    self._cond.notify_all()  # Acorda quem espera worker livre
+
+    def _release(self, frame):
+        """Devolve o frame ao dono (ex.: buffer de captura)"""
+        if self.release is None:
+            return
+        try:
+            self.release(frame)
+        except Exception as e:
+            print(f"⚠️ Erro ao liberar frame: {e}")
+
+
+# ==== ESTÁGIOS PARALELOS POR FRAME ====
+
+_stage_executor = None
+_stage_executor_lock = Lock()
+
+
+def get_stage_executor():
+    """Executor compartilhado dos estágios (criado na primeira chamada)"""
+    global _stage_executor
+    with _stage_executor_lock:
+        if _stage_executor is None:
+            _stage_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="FrameStage")
+        return _stage_executor
+
+
+class StageGraph:
+    """
+    Estágios independentes de um frame, executados em paralelo e reunidos no fim
+
+    Cada estágio é uma função chamada com os mesmos argumentos (ex.: frame e
+    timestamp). O primeiro roda na própria thread que chamou run() e os demais
+    no executor; run() só retorna quando todos terminam.
+    """
+
+    def __init__(self, parallel=True, executor=None):
+        """
+        Args:
+            parallel: False executa em sequência (mesma ordem, útil para comparar)
+            executor: Executor dos estágios (padrão: get_stage_executor())
+        """
+        self.parallel = parallel
+        self.executor = executor
+        self._stages = {}  # Substituído inteiro a cada alteração (leitura sem lock)
+        self._lock = Lock()
+
+    def add(self, name, func):
+        """Registra (ou substitui) um estágio"""
+        with self._lock:
+            stages = dict(self._stages)
+            stages[name] = func
+            self._stages = stages
+
+    def remove(self, name):
+        with self._lock:
+            stages = dict(self._stages)
+            stages.pop(name, None)
+            self._stages = stages
+
+    @property
+    def names(self):
+        return tuple(self._stages)
+
+    def run(self, *args):
+        """
+        Executa todos os estágios
+
+        Returns:
+            dict: nome -> (resultado, exceção ou None)
+        """
+        stages = list(self._stages.items())
+        if not stages:
+            return {}
+
+        if not self.parallel or len(stages) == 1:
+            return {name: _call_stage(func, args) for name, func in stages}
+
+        executor = self.executor or get_stage_executor()
+        futures = [(name, executor.submit(func, *args)) for name, func in stages[1:]]
+
+        first_name, first_func = stages[0]
+        results = {first_name: _call_stage(first_func, args)}
+        for name, future in futures:
+            try:
+                results[name] = (future.result(), None)
+            except Exception as e:
+                results[name] = (None, e)
+        return results
+
+
+def _call_stage(func, args):
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, e
@@ -0,0 +1,150 @@
+"""
+game_window.py
+Localiza a janela do emulador/jogo para capturar só a área útil da tela
+"""
+
+import sys
+
+# Títulos procurados, em ordem de prioridade (substring, sem diferenciar maiúsculas)
+GAME_WINDOW_TITLES = (
+    "Clash Royale",
+    "BlueStacks",
+    "LDPlayer",
+    "MEmu",
+    "NoxPlayer",
+    "MuMu",
+    "Google Play Games",
+    "scrcpy",
+)
+
+MIN_WINDOW_SIZE = 200  # Ignora janelas minimizadas/minúsculas
+
+
+def find_game_window(titles=GAME_WINDOW_TITLES):
+    """
+    Procura a janela do jogo e retorna a área cliente em coordenadas de tela
+
+    Args:
+        titles: Substrings de título aceitas, em ordem de prioridade
+
+    Returns:
+        dict no formato do mss {'left', 'top', 'width', 'height'} ou None
+        se a janela não for encontrada (ou a plataforma não for suportada)
+    """
+    if sys.platform != "win32":
+        return None
+
+    try:
+        return _find_window_win32(titles)
+    except Exception as e:
+        print(f"⚠️ Erro ao procurar janela do jogo: {e}")
+        return None
+
+
+def _find_window_win32(titles):
+    """Implementação Windows via user32 (EnumWindows)"""
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+
+    # Coordenadas físicas, iguais às usadas pelo mss
+    try:
+        user32.SetProcessDPIAware()
+    except Exception:
+        pass
+
+    candidates = []
+    wanted = [t.lower() for t in titles]
+
+    enum_proc_type = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+
+    def enum_proc(hwnd, _lparam):
+        if not user32.IsWindowVisible(hwnd) or user32.IsIconic(hwnd):
+            return True
+
+        length = user32.GetWindowTextLengthW(hwnd)
+        if length == 0:
+            return True
+
+        buffer = ctypes.create_unicode_buffer(length + 1)
+        user32.GetWindowTextW(hwnd, buffer, length + 1)
+        title = buffer.value.lower()
+
+        for priority, name in enumerate(wanted):
+            if name in title:
+                candidates.append((priority, hwnd))
+                break
+        return True
+
+    user32.EnumWindows(enum_proc_type(enum_proc), 0)
+
+    for _priority, hwnd in sorted(candidates, key=lambda c: c[0]):
+        rect = wintypes.RECT()
+        if not user32.GetClientRect(hwnd, ctypes.byref(rect)):
+            continue
+
+        origin = wintypes.POINT(0, 0)
+        user32.ClientToScreen(hwnd, ctypes.byref(origin))
+
+        width = rect.right - rect.left
+        height = rect.bottom - rect.top
+        if width < MIN_WINDOW_SIZE or height < MIN_WINDOW_SIZE:
+            continue
+
+        return {
+            'left': int(origin.x),
+            'top': int(origin.y),
+            'width': int(width),
+            'height': int(height),
+        }
+
+    return None
+
+
+def roi_to_pixels(roi, width, height):
+    """
+    Converte ROI em frações (x1, y1, x2, y2) para pixels (y1, y2, x1, x2)
+
+    Args:
+        roi: Tupla (x1, y1, x2, y2) com valores entre 0 e 1
+        width: Largura da área de captura
+        height: Altura da área de captura
+    """
+    x1, y1, x2, y2 = roi
+    return (
+        int(y1 * height),
+        int(y2 * height),
+        int(x1 * width),
+        int(x2 * width),
+    )
+
+
+def merge_boxes(boxes):
+    """
+    Une caixas (y1, y2, x1, x2) que se sobrepõem ou encostam
+
+    Assim cada pixel é capturado uma única vez.
+    """
+    merged = [b for b in boxes if b[1] > b[0] and b[3] > b[2]]
+
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        while merged:
+            y1, y2, x1, x2 = merged.pop()
+            i = 0
+            while i < len(merged):
+                oy1, oy2, ox1, ox2 = merged[i]
+                if oy1 <= y2 and y1 <= oy2 and ox1 <= x2 and x1 <= ox2:
+                    y1, y2 = min(y1, oy1), max(y2, oy2)
+                    x1, x2 = min(x1, ox1), max(x2, ox2)
+                    merged.pop(i)
+                    changed = True
+                else:
+                    i += 1
+            result.append((y1, y2, x1, x2))
+        merged = result
+
+    return sorted(merged)
@@ -0,0 +1,111 @@
+"""
+import_profile.py
+Perfil do tempo de import (python -X importtime) para manter a inicialização rápida
+
+O painel deve aparecer em poucas centenas de ms: ultralytics/torch, OpenCV e o OCR são
+importados sob demanda (ao carregar os modelos), nunca no import dos módulos.
+Este script acusa quando algum deles volta a ser importado cedo demais.
+
+Uso:
+    python import_profile.py                       # perfil do main.py
+    python import_profile.py analysis_engine --top 20
+    python import_profile.py --budget-ms 400       # falha (código 1) acima do orçamento
+    python main.py --profile-imports
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_MODULE = "main"
+DEFAULT_BUDGET_MS = 500.0
+DEFAULT_TOP = 15
+
+# Pacotes que só podem ser importados sob demanda
+HEAVY_MODULES = ('ultralytics', 'torch', 'torchvision', 'pytesseract', 'tesserocr', 'cv2')
+
+
+def profile_imports(module=DEFAULT_MODULE):
+    """
+    Importa o módulo num processo novo com -X importtime
+
+    Returns:
+        list: (nome, próprio_ms, acumulado_ms, profundidade) na ordem do relatório do Python
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(BASE_DIR), capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{proc.stderr.strip()[-2000:]}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        # import time:   self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip())) // 2
+            entries.append((name.strip(), int(self_us) / 1000.0, int(cumulative_us) / 1000.0, depth))
+        except ValueError:
+            continue
+    return entries
+
+
+def heavy_imports(entries):
+    """Pacotes pesados (HEAVY_MODULES) presentes no import"""
+    found = []
+    for name, _, cumulative_ms, _ in entries:
+        if name in HEAVY_MODULES:
+            found.append((name, cumulative_ms))
+    return found
+
+
+def print_report(module, entries, top=DEFAULT_TOP):
+    total_ms = next((cum for name, _, cum, _ in entries if name == module), 0.0)
+    print(f"📦 import {module}: {total_ms:.0f}ms ({len(entries)} módulos)")
+
+    print(f"\n{'acumulado':>10} {'próprio':>9}  módulo")
+    for name, self_ms, cumulative_ms, depth in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"{cumulative_ms:>8.1f}ms {self_ms:>7.1f}ms  {'  ' * min(depth, 6)}{name}")
+    return total_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil do tempo de import")
+    parser.add_argument("module", nargs="?", default=DEFAULT_MODULE, help="Módulo a importar")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Módulos mais lentos listados")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Tempo máximo aceitável do import")
+    args = parser.parse_args(argv)
+
+    try:
+        entries = profile_imports(args.module)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 2
+
+    total_ms = print_report(args.module, entries, args.top)
+
+    ok = True
+    heavy = heavy_imports(entries)
+    if heavy:
+        ok = False
+        print("\n⚠️ Importados no início (deveriam ser sob demanda):")
+        for name, cumulative_ms in heavy:
+            print(f"   - {name} ({cumulative_ms:.0f}ms)")
+
+    if total_ms > args.budget_ms:
+        ok = False
+        print(f"\n⚠️ Import acima do orçamento: {total_ms:.0f}ms > {args.budget_ms:.0f}ms")
+
+    if ok:
+        print(f"\n✅ Dentro do orçamento ({args.budget_ms:.0f}ms) e sem imports pesados")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,441 @@
+"""
+inference_backend.py
+Backends de inferência do detector de cartas (YOLO)
+- TorchBackend: PyTorch eager com os pesos .pt (sempre disponível com ultralytics)
+- OnnxBackend: ONNX Runtime na CPU (.pt exportado uma vez para .onnx)
+- OpenVinoBackend: OpenVINO na CPU (.pt exportado uma vez para <nome>_openvino_model/)
+
+Os artefatos exportados ficam ao lado dos pesos (um por resolução de entrada)
+e só são refeitos quando o .pt muda. Todos rodam pela API do ultralytics, então a saída (Results) e o
+pós-processamento são os mesmos em qualquer backend.
+
+Na seleção automática ('auto') cada backend disponível é carregado, aquecido e
+medido; fica o de menor latência. Backends exportados só entram se houver imagens
+para conferi-los contra o torch; os descartados são soltos da memória.
+
+A entrada tem resolução fixa (INFERENCE_SIZES): Letterbox redimensiona o frame
+uma vez com o OpenCV num buffer reaproveitado e unletterbox_boxes devolve as
+caixas para as coordenadas originais.
+
+Uso:
+    python inference_backend.py yolo_cards_slots.pt --backend auto
+    python inference_backend.py yolo_cards_slots.pt --verify dataset/raw/session_20251221_193015
+"""
+
+import argparse
+import os
+import shutil
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+import numpy as np
+
+from lazy_imports import get_cv2
+
+BACKEND_NAMES = ('torch', 'onnx', 'openvino')
+DEFAULT_BACKEND = 'auto'
+WARMUP_RUNS = 3       # Inferências descartáveis (a primeira paga a montagem do grafo)
+INFERENCE_SIZES = (320, 416, 640)  # Resoluções de entrada suportadas (múltiplos de 32)
+DEFAULT_IMGSZ = 640   # Lado do quadrado de entrada da rede
+LETTERBOX_COLOR = (114, 114, 114)
+CONF_TOLERANCE = 0.02  # Diferença máxima de confiança entre backends
+BOX_TOLERANCE = 2.0    # Diferença máxima (px) por coordenada de bbox entre backends
+VERIFY_IMAGES = 5      # Frames usados para conferir os backends contra o torch no modo 'auto'
+
+
+def check_inference_size(imgsz):
+    """Valida a resolução de entrada (a rede exige múltiplos de 32)"""
+    imgsz = int(imgsz)
+    if imgsz <= 0 or imgsz % 32:
+        raise ValueError(f"Resolução de inferência inválida: {imgsz} (use múltiplos de 32, ex.: {INFERENCE_SIZES})")
+    return imgsz
+
+
+class Letterbox:
+    """
+    Resize + letterbox para um quadrado fixo, num buffer reaproveitado
+
+    O canvas é alocado uma vez; as bordas só são repintadas quando a geometria
+    muda (frames do mesmo tamanho reescrevem apenas a área da imagem).
+    Não é thread-safe: use uma instância por thread.
+    """
+
+    def __init__(self, size=DEFAULT_IMGSZ, color=LETTERBOX_COLOR):
+        self.size = check_inference_size(size)
+        self.color = color
+        self.canvas = np.full((self.size, self.size, 3), color, dtype=np.uint8)
+        self._geometry = None  # (largura, altura) da última imagem
+
+    def __call__(self, image):
+        """
+        Returns:
+            (canvas size x size, escala aplicada, (pad_x, pad_y))
+        """
+        cv2 = get_cv2()
+        h, w = image.shape[:2]
+        scale = min(self.size / h, self.size / w)
+        new_w, new_h = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+        pad_x, pad_y = (self.size - new_w) // 2, (self.size - new_h) // 2
+
+        if self._geometry != (w, h):
+            self.canvas[...] = self.color
+            self._geometry = (w, h)
+
+        dst = self.canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w]
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        out = cv2.resize(image, (new_w, new_h), dst=dst, interpolation=interpolation)
+        if out is not dst:
+            dst[...] = out  # OpenCV sem suporte a dst com stride
+        return self.canvas, scale, (pad_x, pad_y)
+
+
+def unletterbox_boxes(xyxy, scale, pad, offset=(0, 0), shape=None):
+    """
+    Caixas do canvas do letterbox -> coordenadas da imagem original (in-place)
+
+    Args:
+        xyxy: Array (N, 4) float
+        scale, pad: Retorno do Letterbox
+        offset: Posição (x, y) da imagem recortada no frame
+        shape: (altura, largura) da imagem recortada para limitar as caixas
+    """
+    xyxy[:, [0, 2]] -= pad[0]
+    xyxy[:, [1, 3]] -= pad[1]
+    xyxy /= scale
+    if shape is not None:
+        # Indexação por lista gera cópia: o resultado precisa ser atribuído de volta
+        xyxy[:, [0, 2]] = np.clip(xyxy[:, [0, 2]], 0, shape[1])
+        xyxy[:, [1, 3]] = np.clip(xyxy[:, [1, 3]], 0, shape[0])
+    xyxy[:, [0, 2]] += offset[0]
+    xyxy[:, [1, 3]] += offset[1]
+    return xyxy
+
+
+def _is_fresh(artifact, source):
+    """Artefato exportado existe e é mais novo que os pesos"""
+    try:
+        return artifact.exists() and artifact.stat().st_mtime >= source.stat().st_mtime
+    except OSError:
+        return False
+
+
+class InferenceBackend:
+    """Interface comum: carrega o modelo e roda a inferência (retorna Results do ultralytics)"""
+
+    name = "base"
+    requires = ('ultralytics',)
+
+    def __init__(self, model_path, imgsz=DEFAULT_IMGSZ):
+        self.model_path = Path(model_path)
+        self.imgsz = check_inference_size(imgsz)
+        self.model = None
+        self.latency_ms = None  # Mediana das inferências de aquecimento
+
+    @classmethod
+    def available(cls):
+        """Pacotes necessários instalados (sem importá-los)"""
+        return all(find_spec(module) is not None for module in cls.requires)
+
+    def artifact_path(self):
+        """Arquivo/pasta carregado por este backend"""
+        return self.model_path
+
+    def prepare(self):
+        """Garante o artefato (exporta se preciso) e retorna o caminho"""
+        return self.artifact_path()
+
+    def load(self):
+        from ultralytics import YOLO
+        self.model = YOLO(str(self.prepare()), task='detect')
+        return self
+
+    def unload(self):
+        """Solta o modelo carregado (backend descartado na escolha)"""
+        self.model = None
+
+    def __call__(self, image, **kwargs):
+        kwargs.setdefault('imgsz', self.imgsz)
+        return self.model(image, verbose=False, **kwargs)
+
+    def warmup(self, runs=WARMUP_RUNS):
+        """
+        Inferências descartáveis numa imagem vazia
+
+        Returns:
+            float: Latência (ms) medida, sem contar a primeira passada
+        """
+        image = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        timings = []
+        for _ in range(max(1, runs)):
+            start = time.perf_counter()
+            self(image)
+            timings.append((time.perf_counter() - start) * 1000.0)
+
+        self.latency_ms = float(np.median(timings[1:] if len(timings) > 1 else timings))
+        return self.latency_ms
+
+    def info(self):
+        return {
+            'backend': self.name,
+            'artifact': str(self.artifact_path()),
+            'imgsz': self.imgsz,
+            'latency_ms': self.latency_ms,
+        }
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch eager (comportamento original)"""
+
+    name = "torch"
+
+
+class _ExportedBackend(InferenceBackend):
+    """Backend que roda um artefato exportado a partir do .pt"""
+
+    export_format = None
+
+    def prepare(self):
+        artifact = self.artifact_path()
+        if _is_fresh(artifact, self.model_path):
+            return artifact
+
+        from ultralytics import YOLO
+        print(f"🔧 Exportando {self.model_path.name} para {self.name} em {self.imgsz}px (só na primeira vez)...")
+        exported = Path(YOLO(str(self.model_path)).export(format=self.export_format, imgsz=self.imgsz))
+
+        # O ultralytics grava sem a resolução no nome: renomeia para o artefato desta resolução
+        if exported != artifact:
+            if artifact.is_dir():
+                shutil.rmtree(artifact)
+            os.replace(exported, artifact)
+        print(f"✅ Modelo exportado: {artifact}")
+        return artifact
+
+
+class OnnxBackend(_ExportedBackend):
+    """ONNX Runtime na CPU"""
+
+    name = "onnx"
+    requires = ('ultralytics', 'onnx', 'onnxruntime')
+    export_format = "onnx"
+
+    def artifact_path(self):
+        return self.model_path.with_name(f"{self.model_path.stem}_{self.imgsz}.onnx")
+
+
+class OpenVinoBackend(_ExportedBackend):
+    """OpenVINO na CPU"""
+
+    name = "openvino"
+    requires = ('ultralytics', 'openvino')
+    export_format = "openvino"
+
+    def artifact_path(self):
+        return self.model_path.parent / f"{self.model_path.stem}_{self.imgsz}_openvino_model"
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxBackend,
+    'openvino': OpenVinoBackend,
+}
+
+
+def available_backends():
+    """Backends com as dependências instaladas"""
+    return [name for name, cls in BACKENDS.items() if cls.available()]
+
+
+def boxes_to_arrays(results):
+    """(class_id, confidence, xyxy) de todas as detecções dos Results, em NumPy"""
+    class_ids, confidences, bboxes = [], [], []
+    for result in results:
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            continue
+        class_ids.append(boxes.cls.cpu().numpy())
+        confidences.append(boxes.conf.cpu().numpy())
+        bboxes.append(boxes.xyxy.cpu().numpy())
+    if not class_ids:
+        return np.empty(0, np.int32), np.empty(0, np.float32), np.empty((0, 4), np.float32)
+    return (np.concatenate(class_ids).astype(np.int32), np.concatenate(confidences),
+            np.concatenate(bboxes))
+
+
+def compare_detections(reference, candidate, min_confidence=0.25,
+                       conf_tolerance=CONF_TOLERANCE, box_tolerance=BOX_TOLERANCE):
+    """
+    Confere se duas saídas (Results) têm as mesmas detecções dentro da tolerância
+
+    Detecções são pareadas por classe e ordem de confiança; só entram as acima
+    de min_confidence (perto do limiar, backends podem divergir por arredondamento).
+
+    Returns:
+        (bool, str): Se bate e o motivo quando não bate
+    """
+    ref = boxes_to_arrays(reference)
+    cand = boxes_to_arrays(candidate)
+
+    ref_keep = ref[1] >= min_confidence + conf_tolerance
+    cand_keep = cand[1] >= min_confidence + conf_tolerance
+    ref_ids, ref_conf, ref_box = ref[0][ref_keep], ref[1][ref_keep], ref[2][ref_keep]
+    cand_ids, cand_conf, cand_box = cand[0][cand_keep], cand[1][cand_keep], cand[2][cand_keep]
+
+    if len(ref_ids) != len(cand_ids):
+        return False, f"{len(ref_ids)} detecções na referência, {len(cand_ids)} no backend"
+
+    ref_order = np.lexsort((-ref_conf, ref_ids))
+    cand_order = np.lexsort((-cand_conf, cand_ids))
+    if not np.array_equal(ref_ids[ref_order], cand_ids[cand_order]):
+        return False, "classes diferentes"
+
+    conf_diff = np.abs(ref_conf[ref_order] - cand_conf[cand_order])
+    if conf_diff.size and conf_diff.max() > conf_tolerance:
+        return False, f"confiança difere {conf_diff.max():.3f}"
+
+    box_diff = np.abs(ref_box[ref_order] - cand_box[cand_order])
+    if box_diff.size and box_diff.max() > box_tolerance:
+        return False, f"bbox difere {box_diff.max():.1f}px"
+
+    return True, ""
+
+
+def verify_backend(reference, candidate, images):
+    """
+    Roda os dois backends nas mesmas imagens e compara as detecções
+
+    Returns:
+        (bool, str): Se todas batem e o motivo da primeira divergência
+    """
+    for index, image in enumerate(images):
+        ok, reason = compare_detections(reference(image), candidate(image))
+        if not ok:
+            return False, f"imagem {index}: {reason}"
+    return True, ""
+
+
+def create_backend(model_path, backend=DEFAULT_BACKEND, warmup_runs=WARMUP_RUNS, verify_images=None,
+                   imgsz=DEFAULT_IMGSZ):
+    """
+    Carrega e aquece o backend de inferência
+
+    Args:
+        model_path: Pesos .pt
+        backend: 'auto' (mede os disponíveis e fica com o mais rápido) ou um de BACKEND_NAMES
+        warmup_runs: Inferências de aquecimento/medição por backend
+        verify_images: Imagens BGR para conferir cada backend contra o torch. No modo 'auto'
+                       sem imagens só o torch é carregado (um export divergente nunca
+                       vira o backend ativo em silêncio)
+        imgsz: Resolução de entrada (lado do quadrado)
+
+    Returns:
+        InferenceBackend pronto ou None se nenhum carregar
+    """
+    if backend == 'auto':
+        names = available_backends()
+    elif backend in BACKENDS:
+        names = [backend]
+    else:
+        raise ValueError(f"Backend de inferência inválido: {backend} (use auto, {', '.join(BACKEND_NAMES)})")
+
+    if backend == 'auto' and not verify_images:
+        skipped = [name for name in names if name != 'torch']
+        if skipped:
+            print(f"⚠️ Sem imagens para conferir contra o torch, ignorando: {', '.join(skipped)}")
+        names = [name for name in names if name == 'torch']
+
+    candidates = []
+    verified = []
+    reference = None
+    for name in names:
+        cls = BACKENDS[name]
+        if not cls.available():
+            print(f"⚠️ Backend {name} indisponível (instale {', '.join(cls.requires)})")
+            continue
+        try:
+            instance = cls(model_path, imgsz).load()
+            instance.warmup(warmup_runs)
+        except Exception as e:
+            print(f"⚠️ Backend {name} falhou: {e}")
+            continue
+        print(f"   ⏱️ {name}: {instance.latency_ms:.1f}ms por inferência")
+        candidates.append(instance)
+
+    if verify_images:
+        reference = next((c for c in candidates if c.name == 'torch'), None)
+        if reference is None and TorchBackend.available():
+            try:
+                reference = TorchBackend(model_path, imgsz).load()
+            except Exception as e:
+                print(f"⚠️ Referência torch indisponível para conferir backends: {e}")
+        if reference is not None:
+            checked = []
+            for candidate in candidates:
+                if candidate is reference:
+                    checked.append(candidate)
+                    continue
+                ok, reason = verify_backend(reference, candidate, verify_images)
+                if ok:
+                    checked.append(candidate)
+                    verified.append(candidate)
+                else:
+                    print(f"⚠️ Backend {candidate.name} descartado: detecções divergem ({reason})")
+            candidates = checked
+
+    if backend == 'auto':
+        unverified = [c for c in candidates if c.name != 'torch' and c not in verified]
+        if unverified:
+            print(f"⚠️ Sem conferência contra o torch, ignorando: {', '.join(c.name for c in unverified)}")
+            candidates = [c for c in candidates if c not in unverified]
+            for candidate in unverified:
+                candidate.unload()
+
+    chosen = min(candidates, key=lambda c: c.latency_ms) if candidates else None
+    # Só o escolhido continua na memória (inclui a referência torch carregada à parte)
+    for instance in candidates + [reference]:
+        if instance is not None and instance is not chosen:
+            instance.unload()
+    return chosen
+
+
+def load_verification_images(folder, limit=VERIFY_IMAGES):
+    """Primeiras imagens legíveis da pasta (recursivo) para conferir backends; [] se não houver"""
+    cv2 = get_cv2()
+    from replay_source import IMAGE_EXTENSIONS
+
+    folder = Path(folder)
+    if not folder.is_dir():
+        return []
+    images = []
+    for path in sorted(p for p in folder.rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS):
+        image = cv2.imread(str(path))  # None em ponteiros do Git LFS sem conteúdo
+        if image is not None:
+            images.append(image)
+            if len(images) >= limit:
+                break
+    return images
+
+
+# Teste rápido: mede os backends disponíveis e confere contra o torch
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seleção do backend de inferência do YOLO")
+    parser.add_argument("model", nargs="?", default=str(Path(__file__).resolve().parent / "yolo_cards_slots.pt"))
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=('auto',) + BACKEND_NAMES)
+    parser.add_argument("--runs", type=int, default=10, help="Inferências de medição por backend")
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ, help="Resolução de entrada")
+    parser.add_argument("--verify", help="Pasta com frames para conferir as detecções contra o torch")
+    parser.add_argument("--max-images", type=int, default=20)
+    args = parser.parse_args()
+
+    images = None
+    if args.verify:
+        images = load_verification_images(args.verify, args.max_images)
+        print(f"🖼️ {len(images)} imagens para conferência")
+
+    print(f"📦 Disponíveis: {', '.join(available_backends()) or 'nenhum'}")
+    chosen = create_backend(args.model, args.backend, warmup_runs=args.runs, verify_images=images, imgsz=args.imgsz)
+    if chosen is None:
+        print("❌ Nenhum backend carregou")
+    else:
+        print(f"🏆 Escolhido: {chosen.name} ({chosen.latency_ms:.1f}ms)")
@@ -0,0 +1,362 @@
+"""
+inference_server.py
+Servidor local de inferência em processos separados (YOLO e OCR fora do GIL da interface)
+
+Cada processo carrega o próprio CardDetector e o OCR. Os frames não são
+serializados: o cliente copia a região da imagem para um bloco de memória
+compartilhada (multiprocessing.shared_memory) e manda pela fila só o nome do
+bloco, o shape e o dtype. As respostas (listas/números pequenos) voltam por
+outra fila e uma thread do cliente entrega cada uma a quem fez o pedido.
+
+Uso:
+    server = InferenceServer("yolo_cards_slots.pt", processes=2)
+    server.start()
+    cards = server.run('cards', frame_bgr[:540])
+    server.stop()
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from threading import Thread, Event, Lock
+
+import numpy as np
+
+SERVER_PROCESSES = 1     # Processos de inferência
+SLOTS_PER_PROCESS = 2    # Blocos de memória compartilhada por processo (pedidos simultâneos)
+REQUEST_TIMEOUT = 10.0   # Segundos de espera por uma resposta
+READY_TIMEOUT = 180.0    # Segundos para os processos carregarem os modelos
+MAX_ATTACHED = 16        # Blocos mantidos abertos em cada processo
+TASKS = ('cards', 'elixir')
+
+
+# ==== PROCESSO DE INFERÊNCIA ====
+
+def _attach(handles, name):
+    """Abre (e mantém em cache) o bloco de memória compartilhada criado pelo cliente"""
+    shm = handles.get(name)
+    if shm is not None:
+        handles.move_to_end(name)
+        return shm
+
+    # Com spawn o resource_tracker é o do cliente (dono do bloco): o registro
+    # repetido é ignorado e o unlink continua sendo só do cliente
+    shm = shared_memory.SharedMemory(name=name)
+    handles[name] = shm
+    while len(handles) > MAX_ATTACHED:
+        _, old = handles.popitem(last=False)
+        old.close()
+    return shm
+
+
+def _worker_main(model_path, backend, imgsz, requests, results):
+    """Loop do processo: carrega os modelos e atende pedidos até receber None"""
+    handles = OrderedDict()
+    try:
+        from analysis_engine import CardDetector, ElixirOCR
+        from ocr_backend import get_ocr_backend
+        from digit_recognizer import get_default_recognizer
+
+        detector = CardDetector(model_path, backend=backend, imgsz=imgsz)
+        detector.warmup()
+        try:
+            get_ocr_backend()
+        except RuntimeError as e:
+            print(f"⚠️ [{os.getpid()}] {e}")
+        get_default_recognizer()
+    except Exception as e:
+        results.put(('failed', os.getpid(), f"{type(e).__name__}: {e}"))
+        return
+
+    results.put(('ready', os.getpid(), detector.backend_info()))
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+
+        request_id, task, (name, shape, dtype), params = item
+        try:
+            image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_attach(handles, name).buf)
+            if task == 'cards':
+                value = detector.detect(image, **params)
+            elif task == 'elixir':
+                value = ElixirOCR.extract_elixir(image, **params)
+            else:
+                raise ValueError(f"Tarefa desconhecida: {task}")
+            del image  # Solta a view antes de um eventual close() do bloco
+            results.put(('result', request_id, True, value))
+        except Exception as e:
+            results.put(('result', request_id, False, f"{type(e).__name__}: {e}"))
+
+    for shm in handles.values():
+        shm.close()
+
+
+# ==== CLIENTE ====
+
+class _FrameSlot:
+    """Bloco de memória compartilhada reaproveitado entre pedidos (cresce se preciso)"""
+
+    def __init__(self):
+        self.shm = None
+
+    def write(self, image):
+        """Copia a imagem para o bloco e retorna o cabeçalho (nome, shape, dtype)"""
+        image = np.asarray(image)
+        if self.shm is None or image.nbytes > self.shm.size:
+            self.close()
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=self.shm.buf)
+        view[...] = image  # Única cópia (recortes não contíguos incluídos)
+        del view
+        return self.shm.name, image.shape, image.dtype.str
+
+    def close(self):
+        if self.shm is None:
+            return
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
+        self.shm = None
+
+
+class InferenceServer:
+    """Pool de processos de inferência com frames em memória compartilhada"""
+
+    def __init__(self, model_path, processes=SERVER_PROCESSES, backend='auto', imgsz=640,
+                 request_timeout=REQUEST_TIMEOUT):
+        """
+        Args:
+            model_path: Pesos YOLO (carregados em cada processo)
+            processes: Quantidade de processos (pedidos atendidos em paralelo)
+            backend, imgsz: Repassados ao CardDetector de cada processo
+            request_timeout: Espera máxima por uma resposta (s)
+        """
+        self.model_path = str(model_path)
+        self.processes = max(1, int(processes))
+        self.backend = backend
+        self.imgsz = imgsz
+        self.request_timeout = request_timeout
+
+        self.model_info = None  # backend_info() do primeiro processo (None sem modelo)
+        self._ctx = mp.get_context('spawn')  # Sem fork de Qt/torch/threads do processo da UI
+        self._procs = []
+        self._requests = None
+        self._results = None
+        self._collector = None
+        self._slots = queue.Queue()
+        self._waiting = {}
+        self._lock = Lock()
+        self._ids = itertools.count()
+        self.running = False
+
+        # Estatísticas
+        self.completed = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def start(self, timeout=READY_TIMEOUT, progress=None):
+        """
+        Inicia os processos e espera cada um carregar os modelos
+
+        Args:
+            progress: Callback opcional (prontos, total)
+
+        Returns:
+            bool: True se ao menos um processo ficou pronto
+        """
+        if self.running:
+            return True
+
+        self._requests = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        for index in range(self.processes):
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(self.model_path, self.backend, self.imgsz, self._requests, self._results),
+                daemon=True, name=f"InferenceWorker-{index}",
+            )
+            proc.start()
+            self._procs.append(proc)
+
+        ready = 0
+        deadline = time.monotonic() + timeout
+        while ready < self.processes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print("⚠️ Tempo esgotado esperando os processos de inferência")
+                break
+            try:
+                kind, pid, payload = self._results.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                if not any(p.is_alive() for p in self._procs):
+                    break
+                continue
+
+            if kind == 'ready':
+                ready += 1
+                if self.model_info is None:
+                    self.model_info = payload
+                if progress is not None:
+                    progress(ready, self.processes)
+            elif kind == 'failed':
+                print(f"❌ Processo de inferência {pid} falhou: {payload}")
+
+        if ready == 0:
+            self.stop()
+            return False
+
+        for _ in range(self.processes * SLOTS_PER_PROCESS):
+            self._slots.put(_FrameSlot())
+        self.running = True
+        self._collector = Thread(target=self._collect, daemon=True, name="InferenceResults")
+        self._collector.start()
+        print(f"✅ Servidor de inferência: {ready} processo(s)")
+        return True
+
+    def stop(self, timeout=5.0):
+        """Encerra os processos e libera a memória compartilhada"""
+        with self._lock:
+            self.running = False  # Sob o lock: run() em andamento fecha o slot em vez de devolvê-lo
+        if self._requests is not None:
+            for _ in self._procs:
+                self._requests.put(None)
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = []
+
+        if self._collector is not None:
+            self._results.put(None)
+            self._collector.join(timeout)
+            self._collector = None
+
+        # Acorda quem ainda espera resposta
+        with self._lock:
+            waiting, self._waiting = self._waiting, {}
+        for waiter in waiting.values():
+            waiter[1] = (False, "servidor de inferência parado")
+            waiter[0].set()
+
+        while True:
+            try:
+                self._slots.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def run(self, task, image, **params):
+        """
+        Executa uma tarefa num processo livre e espera o resultado
+
+        Args:
+            task: 'cards' (CardDetector.detect) ou 'elixir' (ElixirOCR.extract_elixir)
+            image: Imagem BGR (copiada uma vez para a memória compartilhada)
+            **params: Argumentos extras da tarefa
+
+        Raises:
+            RuntimeError: Servidor parado ou erro no processo
+            TimeoutError: Sem resposta dentro de request_timeout
+        """
+        if task not in TASKS:
+            raise ValueError(f"Tarefa desconhecida: {task} (use {', '.join(TASKS)})")
+        if not self.running:
+            raise RuntimeError("Servidor de inferência parado")
+
+        try:
+            slot = self._slots.get(timeout=self.request_timeout)
+        except queue.Empty:
+            self.timeouts += 1
+            raise TimeoutError(f"Nenhum slot livre no servidor de inferência para '{task}'") from None
+        request_id = next(self._ids)
+        waiter = [Event(), None]
+        recycle = True
+        try:
+            header = slot.write(image)
+            with self._lock:
+                self._waiting[request_id] = waiter
+            self._requests.put((request_id, task, header, params))
+
+            if not waiter[0].wait(self.request_timeout):
+                # O processo ainda pode ler o bloco: não reaproveita (o unlink só remove
+                # o nome; o mapeamento já aberto no processo continua válido)
+                recycle = False
+                self.timeouts += 1
+                raise TimeoutError(f"Sem resposta do servidor de inferência para '{task}'")
+
+            ok, value = waiter[1]
+            if not ok:
+                self.errors += 1
+                raise RuntimeError(value)
+            self.completed += 1
+            return value
+        finally:
+            with self._lock:
+                self._waiting.pop(request_id, None)
+                if not self.running:
+                    slot.close()  # stop() já esvaziou a fila: devolvido, nunca seria removido
+                elif recycle:
+                    self._slots.put(slot)
+                else:
+                    slot.close()
+                    self._slots.put(_FrameSlot())
+
+    def _collect(self):
+        """Entrega cada resposta ao pedido que a aguarda"""
+        while True:
+            try:
+                item = self._results.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            if item[0] != 'result':
+                continue
+
+            _, request_id, ok, value = item
+            with self._lock:
+                waiter = self._waiting.get(request_id)
+            if waiter is not None:
+                waiter[1] = (ok, value)
+                waiter[0].set()
+
+    def get_stats(self):
+        return {
+            'processes': sum(1 for p in self._procs if p.is_alive()),
+            'completed': self.completed,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+        }
+
+
+# Teste rápido: mesma detecção no processo atual e no servidor
+if __name__ == "__main__":
+    import cv2
+
+    if len(sys.argv) < 2:
+        print("Uso: python inference_server.py frame.png [pesos.pt] [processos]")
+        sys.exit(1)
+
+    frame = cv2.imread(sys.argv[1])
+    if frame is None:
+        print(f"❌ Imagem ilegível: {sys.argv[1]}")
+        sys.exit(1)
+
+    model = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "yolo_cards_slots.pt")
+    server = InferenceServer(model, processes=int(sys.argv[3]) if len(sys.argv) > 3 else 1)
+    if not server.start():
+        sys.exit(1)
+
+    start = time.perf_counter()
+    cards = server.run('cards', frame[:frame.shape[0] // 2])
+    print(f"🃏 {len(cards)} carta(s) em {(time.perf_counter() - start) * 1000:.1f}ms (modelo: {server.model_info})")
+    server.stop()
@@ -0,0 +1,24 @@
+"""
+lazy_imports.py
+Import sob demanda de dependências pesadas usadas no caminho de cada frame
+
+O OpenCV leva centenas de ms para importar e não pode pesar na abertura do
+painel (import_profile.py). Os módulos do pipeline pedem o módulo a get_cv2(),
+que importa uma única vez e devolve a mesma referência nas chamadas seguintes.
+"""
+
+from threading import Lock
+
+_cv2 = None
+_cv2_lock = Lock()
+
+
+def get_cv2():
+    """Módulo cv2 (importado na primeira chamada)"""
+    global _cv2
+    if _cv2 is None:
+        with _cv2_lock:
+            if _cv2 is None:
+                import cv2
+                _cv2 = cv2
+    return _cv2
@@ -4,43 +4,15 @@ Sistema de decisão baseado em regras + ML simples
 100% offline, latência < 50ms
 """
 
-import json
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Tuple
 from dataclasses import dataclass
 
+from cards_db import CARDS_DB
+
 # ==== CONFIGURAÇÕES ====
 
 BASE_DIR = Path(__file__).resolve().parent
-CARDS_DB_PATH = BASE_DIR / "cards_db.json"
-
-# Carregar database de cartas
-def load_cards_db() -> Dict[str, Dict[str, Any]]:
-    if not CARDS_DB_PATH.exists():
-        return {}
-    
-    try:
-        with open(CARDS_DB_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        if isinstance(data, dict) and "cards" in data:
-            cards_list = data["cards"]
-        elif isinstance(data, list):
-            cards_list = data
-        else:
-            return {}
-        
-        cards_db = {}
-        for card in cards_list:
-            name = card.get("name")
-            if name:
-                cards_db[name] = card
-        
-        return cards_db
-    except:
-        return {}
-
-CARDS_DB = load_cards_db()
 
 # ==== SISTEMA DE DECISÃO ====
 
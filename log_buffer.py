@@ -0,0 +1,84 @@
+"""
+log_buffer.py
+Buffer de log limitado (anel) e thread-safe, com agrupamento de mensagens repetidas
+
+Qualquer thread pode chamar append(); a interface lê o conteúdo em lote
+(quando version muda) em vez de redesenhar a cada mensagem.
+"""
+
+import time
+from collections import deque
+from threading import Lock
+
+MAX_LOG_LINES = 200     # Linhas mantidas (as mais antigas são descartadas)
+COALESCE_WINDOW = 10.0  # Segundos em que a mesma mensagem repetida vira contador
+COALESCE_LOOKBACK = 5   # Últimas linhas comparadas (pega repetições intercaladas)
+
+
+class LogEntry:
+    """Linha do log (count > 1 quando mensagens iguais foram agrupadas)"""
+
+    __slots__ = ('timestamp', 'msg_type', 'message', 'count')
+
+    def __init__(self, timestamp, msg_type, message):
+        self.timestamp = timestamp
+        self.msg_type = msg_type
+        self.message = message
+        self.count = 1
+
+
+class LogBuffer:
+    """Anel de linhas de log com agrupamento de repetições recentes"""
+
+    def __init__(self, max_lines=MAX_LOG_LINES, coalesce_window=COALESCE_WINDOW,
+                 lookback=COALESCE_LOOKBACK):
+        """
+        Args:
+            max_lines: Linhas mantidas no anel
+            coalesce_window: Repetição de uma mensagem recente dentro dessa janela (s)
+                             incrementa o contador em vez de criar linha nova
+            lookback: Quantas das últimas linhas são comparadas
+        """
+        self.coalesce_window = coalesce_window
+        self.lookback = lookback
+        self._entries = deque(maxlen=max_lines)
+        self._lock = Lock()
+        self.version = 0  # Muda a cada alteração (a UI só redesenha quando muda)
+        self.total = 0
+        self.coalesced = 0
+
+    def append(self, message, msg_type="info", timestamp=None):
+        """Adiciona mensagem (pode ser chamado de qualquer thread)"""
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self.total += 1
+            entry = self._find_recent(message, msg_type, now)
+            if entry is not None:
+                # Repetição: sobe o contador e move a linha para o fim
+                entry.count += 1
+                entry.timestamp = now
+                self._entries.remove(entry)
+                self._entries.append(entry)
+                self.coalesced += 1
+            else:
+                self._entries.append(LogEntry(now, msg_type, message))
+            self.version += 1
+
+    def _find_recent(self, message, msg_type, now):
+        for index in range(1, min(self.lookback, len(self._entries)) + 1):
+            entry = self._entries[-index]
+            if now - entry.timestamp > self.coalesce_window:
+                break
+            if entry.message == message and entry.msg_type == msg_type:
+                return entry
+        return None
+
+    def entries(self):
+        """Cópia das linhas atuais (timestamp, tipo, mensagem, contador), da mais antiga para a mais nova"""
+        with self._lock:
+            return [(e.timestamp, e.msg_type, e.message, e.count) for e in self._entries]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
@@ -0,0 +1,251 @@
+"""
+metrics.py
+Instrumentação leve do pipeline: timers por estágio, histogramas móveis, gauges e contadores
+
+Sempre ligada por padrão; com a amostragem desligada (enabled = False) os timers
+viram um contexto vazio compartilhado e gauges/contadores retornam na hora.
+
+Exporta em texto Prometheus (arquivo para o textfile collector) ou JSON lines.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from threading import Thread, Event, Lock
+
+import numpy as np
+
+HISTOGRAM_WINDOW = 512        # Amostras mantidas por estágio (janela móvel)
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "clash"
+EXPORT_FORMATS = ('json', 'prometheus')
+
+
+class RollingHistogram:
+    """Últimas N latências (ms) de um estágio + totais acumulados"""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.lock = Lock()
+
+    def observe(self, value_ms):
+        with self.lock:
+            self.samples.append(value_ms)
+            self.count += 1
+            self.total += value_ms
+
+    def snapshot(self):
+        """count/sum acumulados e quantis/máximo da janela"""
+        with self.lock:
+            values = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+            count, total = self.count, self.total
+
+        stats = {'count': count, 'sum_ms': round(total, 3)}
+        if values.size:
+            for q, v in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                stats[f'p{int(q * 100)}_ms'] = round(float(v), 3)
+            stats['max_ms'] = round(float(values.max()), 3)
+        return stats
+
+
+class _StageTimer:
+    """Contexto que mede o bloco com perf_counter (monotônico)"""
+
+    __slots__ = ('registry', 'stage', 'start')
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+
+class _NullTimer:
+    """Contexto vazio usado com a amostragem desligada"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Registro de métricas do processo (thread-safe)"""
+
+    def __init__(self, enabled=True, window=HISTOGRAM_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self._histograms = {}
+        self._gauges = {}
+        self._counters = {}
+        self._lock = Lock()
+
+    def timer(self, stage):
+        """
+        Mede o bloco with como uma amostra do estágio
+
+        Uso:
+            with metrics.timer('detect_cards'):
+                ...
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def observe(self, stage, value_ms):
+        """Registra uma latência (ms) no histograma do estágio"""
+        if not self.enabled:
+            return
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, RollingHistogram(self.window))
+        histogram.observe(value_ms)
+
+    def set_gauge(self, name, value):
+        """Valor instantâneo (ex.: profundidade de fila)"""
+        if self.enabled:
+            self._gauges[name] = value
+
+    def inc(self, name, amount=1):
+        """Incrementa contador (ex.: frames descartados)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Estado atual de todas as métricas"""
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+        return {
+            'timestamp': round(time.time(), 3),
+            'stages': {stage: h.snapshot() for stage, h in sorted(histograms.items())},
+            'gauges': dict(sorted(self._gauges.items())),
+            'counters': dict(sorted(counters.items())),
+        }
+
+    def reset(self):
+        """Descarta todas as amostras, gauges e contadores"""
+        with self._lock:
+            self._histograms.clear()
+            self._gauges.clear()
+            self._counters.clear()
+
+    # ---- Exportação ----
+
+    def to_json_line(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False)
+
+    def to_prometheus(self):
+        """Snapshot no formato de texto do Prometheus (summary por estágio)"""
+        snap = self.snapshot()
+        name = f"{METRIC_PREFIX}_stage_latency_ms"
+        lines = [f"# HELP {name} Latência por estágio do pipeline (ms)", f"# TYPE {name} summary"]
+        for stage, stats in snap['stages'].items():
+            for q in QUANTILES:
+                key = f'p{int(q * 100)}_ms'
+                if key in stats:
+                    lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {stats[key]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["sum_ms"]}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+
+        for gauge, value in snap['gauges'].items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{gauge} gauge")
+            lines.append(f"{METRIC_PREFIX}_{gauge} {value}")
+
+        for counter, value in snap['counters'].items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{counter}_total counter")
+            lines.append(f"{METRIC_PREFIX}_{counter}_total {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, fmt='json'):
+        """
+        Grava as métricas em arquivo
+
+        Args:
+            path: Arquivo de destino
+            fmt: 'json' (acrescenta uma linha por chamada) ou
+                 'prometheus' (sobrescreve de forma atômica, para o textfile collector)
+        """
+        if fmt == 'json':
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(self.to_json_line() + "\n")
+        elif fmt == 'prometheus':
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        else:
+            raise ValueError(f"Formato de exportação inválido: {fmt} (use {', '.join(EXPORT_FORMATS)})")
+
+
+class MetricsExporter:
+    """Exporta o registro periodicamente numa thread própria"""
+
+    def __init__(self, registry, path, fmt='json', interval=5.0):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportação inválido: {fmt} (use {', '.join(EXPORT_FORMATS)})")
+        self.registry = registry
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self.stop_event = Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None:
+            return False
+        self.stop_event.clear()
+        self.thread = Thread(target=self._worker, daemon=True, name="MetricsExporter")
+        self.thread.start()
+        return True
+
+    def stop(self, timeout=2.0):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join(timeout)
+        self.thread = None
+        self._export()  # Última amostra ao parar
+
+    def _worker(self):
+        while not self.stop_event.wait(self.interval):
+            self._export()
+
+    def _export(self):
+        try:
+            self.registry.export(self.path, self.fmt)
+        except OSError as e:
+            print(f"⚠️ Erro ao exportar métricas: {e}")
+
+
+_registry = None
+_registry_lock = Lock()
+
+
+def get_metrics():
+    """Registro compartilhado do processo (criado na primeira chamada)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
@@ -0,0 +1,179 @@
+"""
+ocr_backend.py
+Backends de OCR para os números de elixir
+- TesserocrBackend: engine Tesseract residente no processo (sem fork por leitura)
+- PytesseractBackend: fallback via subprocesso (pytesseract), com lote numa única chamada
+"""
+
+import platform
+from abc import ABC, abstractmethod
+from importlib.util import find_spec
+from threading import Lock
+
+import numpy as np
+
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+DIGIT_WHITELIST = '0123456789'
+BATCH_GAP = 12  # Linhas brancas entre ROIs empilhadas no modo lote
+
+# Só verifica se estão instalados: o import (lento) acontece ao criar o backend
+TESSEROCR_AVAILABLE = find_spec("tesserocr") is not None
+PYTESSERACT_AVAILABLE = find_spec("pytesseract") is not None
+
+
+class OCRBackend(ABC):
+    """Interface comum dos backends de OCR"""
+
+    name = "base"
+
+    @abstractmethod
+    def read_digits(self, image):
+        """
+        Lê os dígitos de uma imagem (escala de cinza ou binária)
+
+        Returns:
+            str: Texto reconhecido (pode conter lixo, filtre os dígitos)
+        """
+
+    def read_digits_batch(self, images):
+        """Lê várias imagens; retorna uma string por imagem"""
+        return [self.read_digits(image) for image in images]
+
+    def close(self):
+        """Libera recursos do backend"""
+
+
+class TesserocrBackend(OCRBackend):
+    """Tesseract em processo via tesserocr: a API fica aquecida entre leituras"""
+
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr
+        self._api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_LINE)
+        self._api.SetVariable("tessedit_char_whitelist", DIGIT_WHITELIST)
+        self._lock = Lock()  # A API do Tesseract não é thread-safe
+
+    def read_digits(self, image):
+        image = np.ascontiguousarray(image)
+        if image.ndim == 3:
+            image = np.ascontiguousarray(image[:, :, 0])
+
+        h, w = image.shape[:2]
+        with self._lock:
+            self._api.SetImageBytes(image.tobytes(), w, h, 1, w)
+            return self._api.GetUTF8Text()
+
+    def read_digits_batch(self, images):
+        # Mesma API para todas as imagens: custo de uma leitura cada, sem processos novos
+        return [self.read_digits(image) for image in images]
+
+    def close(self):
+        with self._lock:
+            self._api.End()
+
+
+class PytesseractBackend(OCRBackend):
+    """Fallback: um processo tesseract por chamada (lento, mas sempre disponível)"""
+
+    name = "pytesseract"
+
+    def __init__(self):
+        import pytesseract
+        self._pytesseract = pytesseract
+        if platform.system() == "Windows":
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+    def read_digits(self, image):
+        config = f'--psm 7 -c tessedit_char_whitelist={DIGIT_WHITELIST}'
+        return self._pytesseract.image_to_string(image, config=config)
+
+    def read_digits_batch(self, images):
+        """
+        Empilha as ROIs verticalmente e faz uma única chamada (--psm 6)
+
+        Cada palavra lida volta para a ROI que contém o centro da sua caixa
+        (image_to_data), então uma ROI sem texto fica com '' em vez de deslocar
+        as seguintes, e não há segunda chamada ao tesseract.
+        """
+        if len(images) <= 1:
+            return [self.read_digits(image) for image in images]
+
+        stacked, spans = _stack_vertical(images)
+        config = f'--psm 6 -c tessedit_char_whitelist={DIGIT_WHITELIST}'
+        data = self._pytesseract.image_to_data(
+            stacked, config=config, output_type=self._pytesseract.Output.DICT
+        )
+
+        words = [[] for _ in images]
+        for text, left, top, height in zip(data['text'], data['left'], data['top'], data['height']):
+            text = text.strip()
+            if not text:
+                continue
+            index = _span_index(spans, top + height / 2)
+            if index is not None:
+                words[index].append((left, text))
+        return [''.join(text for _, text in sorted(found)) for found in words]
+
+
+def _stack_vertical(images):
+    """
+    Empilha imagens em escala de cinza sobre fundo branco
+
+    Returns:
+        (canvas, [(y1, y2)] faixa de cada imagem incluindo metade do espaço ao redor)
+    """
+    gray = [img if img.ndim == 2 else img[:, :, 0] for img in images]
+    width = max(img.shape[1] for img in gray)
+    height = sum(img.shape[0] for img in gray) + BATCH_GAP * (len(gray) + 1)
+
+    canvas = np.full((height, width), 255, dtype=np.uint8)
+    spans = []
+    y = BATCH_GAP
+    for img in gray:
+        h, w = img.shape
+        canvas[y:y + h, :w] = img
+        spans.append((y - BATCH_GAP / 2, y + h + BATCH_GAP / 2))
+        y += h + BATCH_GAP
+    return canvas, spans
+
+
+def _span_index(spans, y):
+    """Índice da faixa que contém y (None se cair fora de todas)"""
+    for index, (y1, y2) in enumerate(spans):
+        if y1 <= y < y2:
+            return index
+    return None
+
+
+_backend = None
+_backend_lock = Lock()
+
+
+def get_ocr_backend():
+    """
+    Retorna o backend compartilhado (criado na primeira chamada)
+
+    Preferência: tesserocr (residente) -> pytesseract (subprocesso)
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _create_backend()
+        return _backend
+
+
+def _create_backend():
+    if TESSEROCR_AVAILABLE:
+        try:
+            backend = TesserocrBackend()
+            print("✅ OCR: engine Tesseract residente (tesserocr)")
+            return backend
+        except Exception as e:
+            print(f"⚠️ tesserocr indisponível ({e}) - usando pytesseract")
+
+    if PYTESSERACT_AVAILABLE:
+        print("⚠️ OCR: pytesseract (um processo por leitura) - instale tesserocr para acelerar")
+        return PytesseractBackend()
+
+    raise RuntimeError("Nenhum backend de OCR disponível (instale tesserocr ou pytesseract)")
@@ -3,17 +3,29 @@ ocr_elixir.py - Versão Melhorada
 Sistema de OCR focado APENAS na região correta do elixir
 """
 
-import cv2
 import numpy as np
-import pytesseract
 from pathlib import Path
 
+from ocr_backend import get_ocr_backend
+from digit_recognizer import get_default_recognizer
+from lazy_imports import get_cv2
+
 class ElixirOCR:
     """Sistema de OCR otimizado para detecção de elixir"""
     
-    def __init__(self):
-        # Configuração do Tesseract
-        pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+    def __init__(self, backend=None, recognizer=None):
+        """
+        Args:
+            backend: Backend de OCR (padrão: engine residente se disponível, senão pytesseract)
+            recognizer: Reconhecedor rápido de dígitos (padrão: templates calibrados,
+                        False desativa). O OCR só roda quando ele estiver incerto.
+        """
+        self.backend = backend or get_ocr_backend()
+        self.recognizer = get_default_recognizer() if recognizer is None else (recognizer or None)
+        
+        # Estatísticas: leituras resolvidas pelo caminho rápido vs OCR
+        self.fast_reads = 0
+        self.ocr_reads = 0
         
         # Regiões calibradas (AJUSTE ESTES VALORES PARA SUA RESOLUÇÃO!)
         # Formato: (y1, y2, x1, x2) em porcentagem da tela
@@ -41,76 +53,147 @@ class ElixirOCR:
         """Extrai elixir do OPONENTE"""
         return self._extract_elixir(frame_bgr, 'opponent_elixir', self.opp_history)
     
-    def _extract_elixir(self, frame_bgr, region_key, history_list):
-        """Método interno para extrair elixir de uma região"""
+    def extract_both(self, frame_bgr):
+        """
+        Extrai SEU elixir e o do OPONENTE numa única chamada ao OCR
+        
+        Returns:
+            tuple: (meu_elixir, elixir_oponente)
+        """
+        keys = ('my_elixir', 'opponent_elixir')
+        histories = (self.my_history, self.opp_history)
+        
         try:
-            h, w = frame_bgr.shape[:2]
-            region = self.regions[region_key]
+            texts = [None, None]
+            pending = []  # (índice, imagem pré-processada) que precisam de OCR
             
-            # Calcula coordenadas em pixels
-            y1 = int(h * region['y'][0])
-            y2 = int(h * region['y'][1])
-            x1 = int(w * region['x'][0])
-            x2 = int(w * region['x'][1])
-            
-            # Extrai região
-            roi = frame_bgr[y1:y2, x1:x2]
-            
-            if roi.size == 0:
-                return self._get_smoothed_value(history_list)
-            
-            # Pré-processamento AGRESSIVO
-            # 1. Converte para escala de cinza
-            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-            
-            # 2. Aumenta contraste
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-            enhanced = clahe.apply(gray)
+            for i, key in enumerate(keys):
+                roi = self._crop_roi(frame_bgr, key)
+                value = self._fast_read(roi, key)
+                if value is not None:
+                    texts[i] = str(value)
+                    continue
+                
+                binary = self._preprocess(roi)
+                if binary is None:
+                    texts[i] = ''
+                else:
+                    pending.append((i, binary))
             
-            # 3. Binarização adaptativa
-            binary = cv2.adaptiveThreshold(
-                enhanced, 255,
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY,
-                11, 2
-            )
+            if pending:
+                self.ocr_reads += len(pending)
+                results = self.backend.read_digits_batch([img for _, img in pending])
+                for (i, _), text in zip(pending, results):
+                    texts[i] = text
             
-            # 4. Inverte se necessário (texto branco em fundo escuro)
-            if np.mean(binary) < 127:
-                binary = cv2.bitwise_not(binary)
+            return tuple(self._parse_value(text or '', history) for text, history in zip(texts, histories))
+        
+        except Exception as e:
+            print(f"❌ OCR Erro: {e}")
+            return tuple(self._get_smoothed_value(h) for h in histories)
+    
+    def _extract_elixir(self, frame_bgr, region_key, history_list):
+        """Método interno para extrair elixir de uma região"""
+        try:
+            roi = self._crop_roi(frame_bgr, region_key)
             
-            # 5. Remove ruído
-            kernel = np.ones((2,2), np.uint8)
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-            binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
+            # Caminho rápido: templates de dígitos
+            value = self._fast_read(roi, region_key)
+            if value is not None:
+                return self._parse_value(str(value), history_list)
             
-            # 6. Redimensiona para melhorar OCR (3x maior)
-            h_roi, w_roi = binary.shape
-            resized = cv2.resize(binary, (w_roi * 3, h_roi * 3), interpolation=cv2.INTER_CUBIC)
+            binary = self._preprocess(roi)
+            if binary is None:
+                return self._get_smoothed_value(history_list)
             
             # OCR APENAS NÚMEROS
-            config = '--psm 7 -c tessedit_char_whitelist=0123456789'
-            text = pytesseract.image_to_string(resized, config=config)
-            
-            # Extrai apenas dígitos
-            digits = ''.join(filter(str.isdigit, text))
-            
-            if digits:
-                value = int(digits)
-                # Valida range (elixir vai de 0 a 10)
-                if 0 <= value <= 10:
-                    history_list.append(value)
-                    if len(history_list) > self.max_history:
-                        history_list.pop(0)
-                    return value
-            
-            # Se falhou, usa valor suavizado do histórico
-            return self._get_smoothed_value(history_list)
+            self.ocr_reads += 1
+            text = self.backend.read_digits(binary)
+            return self._parse_value(text, history_list)
             
         except Exception as e:
             print(f"❌ OCR Erro: {e}")
             return self._get_smoothed_value(history_list)
     
+    def _fast_read(self, roi, region_key):
+        """Lê a ROI pelos templates da região; None se indisponível ou incerto"""
+        if self.recognizer is None or roi is None:
+            return None
+        
+        value, confidence = self.recognizer.recognize(roi, region_key)
+        if value is None or not self.recognizer.is_confident(confidence):
+            return None
+        
+        self.fast_reads += 1
+        return value
+    
+    def _crop_roi(self, frame_bgr, region_key):
+        """Recorta a região (retorna None se a ROI for vazia)"""
+        h, w = frame_bgr.shape[:2]
+        region = self.regions[region_key]
+        
+        # Calcula coordenadas em pixels
+        y1 = int(h * region['y'][0])
+        y2 = int(h * region['y'][1])
+        x1 = int(w * region['x'][0])
+        x2 = int(w * region['x'][1])
+        
+        # Extrai região
+        roi = frame_bgr[y1:y2, x1:x2]
+        return roi if roi.size > 0 else None
+    
+    def _preprocess(self, roi):
+        """Pré-processa a ROI para o OCR (retorna None se a ROI for vazia)"""
+        cv2 = get_cv2()
+        if roi is None:
+            return None
+        
+        # Pré-processamento AGRESSIVO
+        # 1. Converte para escala de cinza
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        
+        # 2. Aumenta contraste
+        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
+        enhanced = clahe.apply(gray)
+        
+        # 3. Binarização adaptativa
+        binary = cv2.adaptiveThreshold(
+            enhanced, 255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY,
+            11, 2
+        )
+        
+        # 4. Inverte se necessário (texto branco em fundo escuro)
+        if np.mean(binary) < 127:
+            binary = cv2.bitwise_not(binary)
+        
+        # 5. Remove ruído
+        kernel = np.ones((2,2), np.uint8)
+        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+        binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
+        
+        # 6. Redimensiona para melhorar OCR (3x maior)
+        h_roi, w_roi = binary.shape
+        return cv2.resize(binary, (w_roi * 3, h_roi * 3), interpolation=cv2.INTER_CUBIC)
+    
+    def _parse_value(self, text, history_list):
+        """Valida o texto do OCR e atualiza o histórico"""
+        # Extrai apenas dígitos
+        digits = ''.join(filter(str.isdigit, text))
+        
+        if digits:
+            value = int(digits)
+            # Valida range (elixir vai de 0 a 10)
+            if 0 <= value <= 10:
+                history_list.append(value)
+                if len(history_list) > self.max_history:
+                    history_list.pop(0)
+                return value
+        
+        # Se falhou, usa valor suavizado do histórico
+        return self._get_smoothed_value(history_list)
+    
     def _get_smoothed_value(self, history_list):
         """Retorna média dos últimos valores válidos"""
         if not history_list:
@@ -124,6 +207,7 @@ class ElixirOCR:
         Modo de calibração: salva imagens das regiões para você ajustar
         Use isso para encontrar as coordenadas corretas!
         """
+        cv2 = get_cv2()
         h, w = frame_bgr.shape[:2]
         
         for region_name, region in self.regions.items():
@@ -150,6 +234,75 @@ class ElixirOCR:
         self.opp_history.clear()
 
 
+class ElixirBarReader:
+    """
+    Lê o elixir pelo preenchimento da barra roxa (sem OCR)
+    
+    Retorna valor fracionário (ex.: 6.4), coisa que o número na tela não mostra.
+    """
+    
+    def __init__(self, region=None, max_elixir=10):
+        """
+        Args:
+            region: Faixa da barra em porcentagem da tela {'y': (y1, y2), 'x': (x1, x2)}
+                    (AJUSTE PARA SUA RESOLUÇÃO! x1 = início da barra, após o ícone da gota)
+            max_elixir: Valor da barra cheia
+        """
+        self.region = region or {
+            'y': (0.955, 0.985),
+            'x': (0.27, 0.95),
+        }
+        self.max_elixir = max_elixir
+        
+        # Roxo/magenta do elixir em HSV (H do OpenCV vai de 0 a 179)
+        self.hsv_low = np.array([130, 90, 90], dtype=np.uint8)
+        self.hsv_high = np.array([170, 255, 255], dtype=np.uint8)
+        
+        self.column_threshold = 0.5  # Fração de pixels roxos para a coluna contar como cheia
+        self.smooth_width = 5        # Ignora divisórias finas entre os segmentos da barra
+        self._kernel = np.ones(self.smooth_width, dtype=np.float32) / self.smooth_width
+    
+    def read(self, frame_bgr):
+        """
+        Mede o preenchimento da barra
+        
+        Returns:
+            float: Elixir com uma casa decimal, ou None se a faixa for vazia
+        """
+        fraction = self.fill_fraction(frame_bgr)
+        if fraction is None:
+            return None
+        return round(fraction * self.max_elixir, 1)
+    
+    def fill_fraction(self, frame_bgr):
+        """Fração preenchida da barra (0.0 a 1.0) ou None se a faixa for vazia"""
+        cv2 = get_cv2()
+        h, w = frame_bgr.shape[:2]
+        y1 = int(h * self.region['y'][0])
+        y2 = int(h * self.region['y'][1])
+        x1 = int(w * self.region['x'][0])
+        x2 = int(w * self.region['x'][1])
+        
+        strip = frame_bgr[y1:y2, x1:x2]
+        if strip.size == 0:
+            return None
+        
+        # Máscara de pixels roxos e varredura vetorizada por coluna
+        hsv = cv2.cvtColor(strip, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, self.hsv_low, self.hsv_high)
+        columns = (mask > 0).mean(axis=0)
+        
+        if len(columns) >= self.smooth_width:
+            columns = np.convolve(columns, self._kernel, mode='same')
+        
+        filled = np.flatnonzero(columns >= self.column_threshold)
+        if filled.size == 0:
+            return 0.0
+        
+        # A barra enche da esquerda para a direita: vale a última coluna cheia
+        return min(1.0, (filled[-1] + 1) / len(columns))
+
+
 # ===== TESTE DO SISTEMA =====
 if __name__ == "__main__":
     import mss
@@ -164,8 +317,8 @@ if __name__ == "__main__":
         
         # Captura uma vez para calibração
         screenshot = sct.grab(monitor)
-        img = np.array(screenshot)[:, :, :3]
-        frame_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        # mss entrega BGRA: basta descartar o alfa
+        frame_bgr = np.ascontiguousarray(np.asarray(screenshot)[:, :, :3])
         
         print("📸 Calibrando regiões...")
         ocr.calibrate_regions(frame_bgr)
@@ -175,11 +328,9 @@ if __name__ == "__main__":
         try:
             while True:
                 screenshot = sct.grab(monitor)
-                img = np.array(screenshot)[:, :, :3]
-                frame_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+                frame_bgr = np.ascontiguousarray(np.asarray(screenshot)[:, :, :3])
                 
-                my_elixir = ocr.extract_my_elixir(frame_bgr)
-                opp_elixir = ocr.extract_opponent_elixir(frame_bgr)
+                my_elixir, opp_elixir = ocr.extract_both(frame_bgr)
                 
                 print(f"\r⚡ Meu: {my_elixir} | Oponente: {opp_elixir}", end='', flush=True)
                 
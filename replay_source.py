@@ -0,0 +1,338 @@
+"""
+replay_source.py
+Fonte de frames gravados (pastas de PNG/JPG ou vídeos) com a mesma interface do ScreenCapture
+
+Permite passar sessões do dataset pelo pipeline ao vivo (AnalysisEngine) de forma
+reproduzível. Cada frame sai com o timestamp de quando foi gravado, então os
+trackers baseados em tempo (elixir, anti-spam, nova partida) se comportam como na partida real.
+
+Modos:
+    'realtime' - respeita o intervalo original entre frames (pode descartar se o consumidor atrasar)
+    'fixed'    - taxa fixa em FPS (pode descartar se o consumidor atrasar)
+    'max'      - o mais rápido possível, sem descartar nenhum frame (medição de throughput)
+
+Uso:
+    source = ReplaySource("dataset/raw/session_20251221_193015", mode="max")
+    engine = AnalysisEngine(source=source)
+    for result in engine.results():
+        ...
+"""
+
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from queue import Queue, Empty, Full
+from threading import Thread, Event, Lock
+
+import cv2
+
+from frame_buffer import TimedFrame
+
+REPLAY_MODES = ('realtime', 'fixed', 'max')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.webm')
+QUEUE_SIZE = 3
+INDEX_FPS = 60.0  # FPS do vídeo de origem para frames nomeados pelo índice (frame_0000600.png)
+
+# frame_20251221_193016_783.png (save_frames / coletor de dataset)
+_DATETIME_NAME = re.compile(r"(\d{8})_(\d{6})_(\d{3})")
+# frame_0000600.png (extract_frames_from_video.py)
+_INDEX_NAME = re.compile(r"frame_(\d+)$")
+
+
+def parse_frame_timestamp(name):
+    """
+    Extrai o instante de captura do nome do arquivo
+
+    Returns:
+        float: Epoch (frame_YYYYMMDD_HHMMSS_mmm) ou segundos desde o início
+               do vídeo (frame_NNNNNNN, assumindo INDEX_FPS); None se não reconhecer
+    """
+    stem = Path(name).stem
+
+    match = _DATETIME_NAME.search(stem)
+    if match:
+        date, clock, millis = match.groups()
+        try:
+            moment = datetime.strptime(date + clock, "%Y%m%d%H%M%S")
+        except ValueError:
+            return None
+        return moment.timestamp() + int(millis) / 1000.0
+
+    match = _INDEX_NAME.search(stem)
+    if match:
+        return int(match.group(1)) / INDEX_FPS
+
+    return None
+
+
+class ReplaySource:
+    """Reproduz frames gravados com a interface do ScreenCapture"""
+
+    def __init__(self, path, mode='max', fps=1.0, step=1, max_frames=None, queue_size=QUEUE_SIZE):
+        """
+        Args:
+            path: Pasta com imagens (ordenadas pelo nome) ou arquivo de vídeo
+            mode: 'realtime', 'fixed' ou 'max'
+            fps: Taxa do modo 'fixed'; também gera timestamps quando o nome do arquivo não tem
+            step: Usa 1 a cada N frames (útil em vídeos de 30/60 FPS)
+            max_frames: Para após N frames entregues (None = até o fim)
+            queue_size: Frames lidos antecipadamente
+        """
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Modo de replay inválido: {mode} (use {', '.join(REPLAY_MODES)})")
+
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Replay não encontrado: {self.path}")
+
+        self.mode = mode
+        self.fps = fps
+        self.step = max(1, int(step))
+        self.max_frames = max_frames
+        self.frame_queue = Queue(maxsize=queue_size)
+        self.stop_event = Event()
+        self.thread = None
+        self.lock = Lock()
+        self._frame_listeners = []
+
+        self.is_video = self.path.is_file()
+        self.files = [] if self.is_video else sorted(
+            p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS
+        )
+
+        # Estatísticas
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.frames_unreadable = 0
+        self.finished = False
+
+    @property
+    def total_frames(self):
+        """Quantidade de frames que serão lidos (None para vídeos)"""
+        if self.is_video:
+            return None
+        total = len(self.files[::self.step])
+        return min(total, self.max_frames) if self.max_frames else total
+
+    @property
+    def is_running(self):
+        """True enquanto houver frames a ler ou na fila"""
+        return self.thread is not None and (self.thread.is_alive() or not self.frame_queue.empty())
+
+    def start(self):
+        """Inicia a leitura em background (sempre do começo)"""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                print("⚠️ Replay já está rodando")
+                return False
+
+            if not self.is_video and not self.files:
+                print(f"❌ Nenhuma imagem em {self.path}")
+                return False
+
+            self.stop_event.clear()
+            self.frames_read = 0
+            self.frames_dropped = 0
+            self.frames_unreadable = 0
+            self.finished = False
+            self.thread = Thread(target=self._replay_worker, daemon=True, name="ReplaySource")
+            self.thread.start()
+            print(f"▶️ Replay iniciado: {self.path.name} (modo {self.mode})")
+            return True
+
+    def stop(self, timeout=2.0):
+        """Interrompe a leitura e descarta frames pendentes"""
+        with self.lock:
+            if self.thread is None:
+                return
+            self.stop_event.set()
+
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            print("⚠️ Thread de replay não terminou no tempo esperado")
+        self.thread = None
+
+        while not self.frame_queue.empty():
+            try:
+                self.frame_queue.get_nowait()
+            except Empty:
+                break
+
+    def get_frame(self):
+        """Próximo frame (BGR) ou None"""
+        timed = self.get_timed_frame()
+        return timed.image if timed is not None else None
+
+    def get_timed_frame(self):
+        """Próximo frame como TimedFrame(image, timestamp, seq) ou None"""
+        try:
+            return self.frame_queue.get_nowait()
+        except Empty:
+            return None
+
+    def release_frame(self, frame):
+        """Sem efeito: cada frame do replay é um array próprio"""
+
+    def add_frame_listener(self, callback):
+        """Registra callback() chamado (na thread do replay) a cada frame enfileirado"""
+        if callback not in self._frame_listeners:
+            self._frame_listeners = self._frame_listeners + [callback]
+
+    def remove_frame_listener(self, callback):
+        self._frame_listeners = [c for c in self._frame_listeners if c != callback]
+
+    def get_stats(self):
+        """Contadores do replay"""
+        return {
+            'read': self.frames_read,
+            'dropped': self.frames_dropped,
+            'unreadable': self.frames_unreadable,
+            'finished': self.finished,
+            'total': self.total_frames,
+        }
+
+    # ---- Leitura ----
+
+    def _iter_frames(self):
+        """Gera (imagem, timestamp) na ordem de gravação"""
+        if self.is_video:
+            yield from self._iter_video()
+            return
+
+        for position, path in enumerate(self.files[::self.step]):
+            image = cv2.imread(str(path))
+            if image is None:
+                self.frames_unreadable += 1
+                continue
+            timestamp = parse_frame_timestamp(path.name)
+            if timestamp is None:
+                timestamp = position * self.step / self.fps
+            yield image, timestamp
+
+    def _iter_video(self):
+        cap = cv2.VideoCapture(str(self.path))
+        if not cap.isOpened():
+            print(f"❌ Erro ao abrir vídeo: {self.path}")
+            return
+
+        native_fps = cap.get(cv2.CAP_PROP_FPS)
+        if native_fps <= 0:
+            native_fps = 30.0  # fallback
+
+        index = 0
+        try:
+            while not self.stop_event.is_set():
+                # grab() sem decodificar os frames pulados
+                for _ in range(self.step - 1):
+                    if not cap.grab():
+                        return
+                    index += 1
+
+                ok, image = cap.read()
+                if not ok:
+                    return
+                yield image, index / native_fps
+                index += 1
+        finally:
+            cap.release()
+
+    def _replay_worker(self):
+        """Lê frames e os entrega no ritmo do modo escolhido"""
+        start_mono = None
+        first_timestamp = None
+        seq = 0
+
+        try:
+            for image, timestamp in self._iter_frames():
+                if self.stop_event.is_set():
+                    break
+
+                # Ritmo: prazo absoluto a partir do primeiro frame (sem acumular atraso)
+                if start_mono is None:
+                    start_mono = time.monotonic()
+                    first_timestamp = timestamp
+                if self.mode == 'realtime':
+                    deadline = start_mono + max(0.0, timestamp - first_timestamp)
+                elif self.mode == 'fixed':
+                    deadline = start_mono + seq / self.fps
+                else:
+                    deadline = None
+
+                if deadline is not None:
+                    delay = deadline - time.monotonic()
+                    if delay > 0 and self.stop_event.wait(delay):
+                        break
+
+                self._put(TimedFrame(image, timestamp, seq))
+                seq += 1
+                self.frames_read += 1
+                if self.max_frames and self.frames_read >= self.max_frames:
+                    break
+            else:
+                self.finished = True
+        except Exception as e:
+            print(f"❌ Erro no replay: {e}")
+
+        if self.max_frames and self.frames_read >= self.max_frames:
+            self.finished = True
+        if self.frames_unreadable:
+            # Ex.: ponteiros do Git LFS sem o conteúdo baixado
+            print(f"⚠️ {self.frames_unreadable} frame(s) ilegível(is) ignorado(s) em {self.path.name}")
+
+    def _put(self, timed):
+        self._enqueue(timed)
+        for listener in self._frame_listeners:
+            listener()
+
+    def _enqueue(self, timed):
+        if self.mode == 'max':
+            # Sem descarte: espera o consumidor
+            while not self.stop_event.is_set():
+                try:
+                    self.frame_queue.put(timed, timeout=0.1)
+                    return
+                except Full:
+                    continue
+            return
+
+        # Tempo real / taxa fixa: igual à captura ao vivo, descarta o mais antigo
+        try:
+            self.frame_queue.put_nowait(timed)
+        except Full:
+            try:
+                self.frame_queue.get_nowait()
+                self.frames_dropped += 1
+            except Empty:
+                pass
+            try:
+                self.frame_queue.put_nowait(timed)
+            except Full:
+                self.frames_dropped += 1
+
+
+# Teste rápido: lê a sessão do dataset na velocidade máxima
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else Path(__file__).resolve().parent / "dataset" / "raw" / "session_20251221_193015"
+    source = ReplaySource(path, mode='max')
+    source.start()
+
+    count = 0
+    first = last = None
+    t0 = time.perf_counter()
+    while source.is_running:
+        timed = source.get_timed_frame()
+        if timed is None:
+            time.sleep(0.001)
+            continue
+        first = timed.timestamp if first is None else first
+        last = timed.timestamp
+        count += 1
+
+    elapsed = time.perf_counter() - t0
+    print(f"📊 {count} frames em {elapsed:.2f}s ({count / max(elapsed, 1e-6):.1f} FPS de leitura)")
+    if count:
+        print(f"⏱️ Duração gravada: {last - first:.1f}s")
@@ -0,0 +1,21 @@
+import numpy as np
+
+from inference_backend import unletterbox_boxes
+
+
+def test_unletterbox_clamps_boxes_outside_image():
+    xyxy = np.array([[-10.0, -5.0, 700.0, 700.0]])
+    out = unletterbox_boxes(xyxy, scale=1.0, pad=(0, 0), shape=(480, 640))
+    np.testing.assert_allclose(out, [[0.0, 0.0, 640.0, 480.0]])
+
+
+def test_unletterbox_applies_offset_after_clamp():
+    xyxy = np.array([[-10.0, -5.0, 700.0, 700.0]])
+    out = unletterbox_boxes(xyxy, scale=1.0, pad=(0, 0), offset=(100, 50), shape=(480, 640))
+    np.testing.assert_allclose(out, [[100.0, 50.0, 740.0, 530.0]])
+
+
+def test_unletterbox_undoes_padding_and_scale():
+    xyxy = np.array([[20.0, 40.0, 120.0, 140.0]])
+    out = unletterbox_boxes(xyxy, scale=0.5, pad=(10, 20), shape=(1000, 1000))
+    np.testing.assert_allclose(out, [[20.0, 40.0, 220.0, 240.0]])
@@ -1,6 +1,8 @@
 import json
 import os
 
+from cards_db import rebuild_cards_cache
+
 # Mapeamento de nomes PT -> EN (apenas as cartas que faltam)
 card_translations = {
     # Campeões que faltam
@@ -94,6 +96,9 @@ def update_cards_json():
     with open(json_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
     
+    # Refaz o cache binário do banco de cartas (cards_db.py)
+    rebuild_cards_cache(json_path)
+    
     print(f"\n✅ Arquivo atualizado: {json_path}")
     print(f"📈 Total de cartas: {len(data['cards'])}")
     print(f"➕ Cartas adicionadas: {added}")
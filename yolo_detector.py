@@ -4,27 +4,56 @@ Detecção de cartas usando YOLO (opcional)
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
 
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
-    YOLO_AVAILABLE = False
+from inference_backend import Letterbox, check_inference_size, unletterbox_boxes
+
+# Só verifica a instalação: ultralytics/torch são importados ao carregar o modelo
+YOLO_AVAILABLE = find_spec("ultralytics") is not None
+
+
+CONFIDENCE_THRESHOLD = 0.5
+
+
+def letterbox(image: np.ndarray, size: int = 640) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Redimensiona mantendo proporção e completa com bordas até size x size.
+    
+    Aloca um canvas novo a cada chamada; no laço de detecção use Letterbox
+    (inference_backend.py), que reaproveita o buffer.
+    
+    Returns:
+        (imagem quadrada, escala aplicada, (pad_x, pad_y))
+    """
+    return Letterbox(size)(image)
 
 
 class YOLODetector:
-    def __init__(self, model_path: str = "yolo_clash_royale.pt"):
+    def __init__(self, model_path: str = "yolo_clash_royale.pt", batched: bool = True, imgsz: int = 640):
         """
         Inicializa o detector YOLO.
         
         Args:
             model_path: Caminho para o modelo YOLO treinado (padrão: model_path fornecido ou None)
+            batched: Roda todas as regiões num único forward (lote) em vez de um por região
+            imgsz: Resolução de entrada da rede (320, 416, 640...): cada região passa
+                   por letterbox até imgsz x imgsz
         """
         self.model = None
         self.model_path = model_path
+        self.batched = batched
+        self.imgsz = check_inference_size(imgsz)
+        self._letterboxes = {}  # Um buffer reaproveitado por região
+
+        # Regiões da tela (ajuste conforme necessário)
+        self.regions = {
+            "myCards": (0, 0.85, 1, 1),           # Bottom 15% - suas cartas
+            "myTroops": (0, 0.5, 1, 0.85),        # Seu lado do campo
+            "opponentTroops": (0, 0.15, 1, 0.5),  # Lado do oponente
+        }
         
         if not YOLO_AVAILABLE:
             print("⚠️ ultralytics não instalado. YOLO desabilitado.")
@@ -37,19 +66,13 @@ class YOLODetector:
             return
         
         try:
+            from ultralytics import YOLO
             self.model = YOLO(model_path)
             print(f"✅ Modelo YOLO carregado: {model_path}")
         except Exception as e:
             print(f"❌ Erro ao carregar YOLO: {e}")
             self.model = None
 
-        # Regiões da tela (ajuste conforme necessário)
-        self.regions = {
-            "myCards": (0, 0.85, 1, 1),           # Bottom 15% - suas cartas
-            "myTroops": (0, 0.5, 1, 0.85),        # Seu lado do campo
-            "opponentTroops": (0, 0.15, 1, 0.5),  # Lado do oponente
-        }
-
     def detect(self, image: np.ndarray) -> Dict[str, Any]:
         """
         Detecta cartas e tropas na imagem.
@@ -75,51 +98,22 @@ class YOLODetector:
             }
 
         try:
-            h, w = image.shape[:2]
             results = {
                 "myCards": [],
                 "myTroopsOnField": [],
                 "opponentTroopsOnField": [],
                 "opponentLastPlay": None,
             }
+            keys = {
+                "myCards": "myCards",
+                "myTroops": "myTroopsOnField",
+                "opponentTroops": "opponentTroopsOnField",
+            }
 
-            # Detectar em cada região
-            for region_name, (x1, y1, x2, y2) in self.regions.items():
-                x1_px = int(x1 * w)
-                y1_px = int(y1 * h)
-                x2_px = int(x2 * w)
-                y2_px = int(y2 * h)
-
-                roi = image[y1_px:y2_px, x1_px:x2_px]
-                
-                if roi.size == 0:
-                    continue
-
-                detections = self.model(roi, verbose=False)
-
-                for det in detections:
-                    if det.boxes is None:
-                        continue
-                    
-                    for box in det.boxes:
-                        cls_id = int(box.cls[0])
-                        conf = float(box.conf[0])
-                        
-                        if conf < 0.5:  # Threshold de confiança
-                            continue
-                        
-                        # Obter nome da classe
-                        card_name = self.model.names.get(cls_id, f"unknown_{cls_id}")
-
-                        if region_name == "myCards":
-                            if card_name not in results["myCards"]:
-                                results["myCards"].append(card_name)
-                        elif region_name == "myTroops":
-                            if card_name not in results["myTroopsOnField"]:
-                                results["myTroopsOnField"].append(card_name)
-                        elif region_name == "opponentTroops":
-                            if card_name not in results["opponentTroopsOnField"]:
-                                results["opponentTroopsOnField"].append(card_name)
+            for det in self.detect_boxes(image):
+                names = results[keys[det["region"]]]
+                if det["name"] not in names:
+                    names.append(det["name"])
 
             # Última jogada do oponente (carta mais recente detectada)
             if results["opponentTroopsOnField"]:
@@ -136,6 +130,87 @@ class YOLODetector:
                 "opponentLastPlay": None,
             }
 
+    def detect_boxes(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Detecta em todas as regiões e retorna as caixas em coordenadas do frame.
+        
+        Returns:
+            Lista de {"region", "name", "confidence", "bbox": [x1, y1, x2, y2]}
+        """
+        if self.model is None:
+            return []
+
+        h, w = image.shape[:2]
+        crops = []
+        for region_name, (x1, y1, x2, y2) in self.regions.items():
+            x1_px, y1_px = int(x1 * w), int(y1 * h)
+            x2_px, y2_px = int(x2 * w), int(y2 * h)
+            roi = image[y1_px:y2_px, x1_px:x2_px]
+            if roi.size == 0:
+                continue
+            crops.append((region_name, roi, (x1_px, y1_px)))
+
+        if not crops:
+            return []
+
+        if self.batched:
+            return self._detect_batched(crops)
+
+        detections = []
+        for region_name, roi, offset in crops:
+            boxed, scale, pad = self._letterbox(region_name)(roi)
+            for det in self.model(boxed, imgsz=self.imgsz, verbose=False):
+                detections.extend(self._decode(det, region_name, scale, pad, offset, roi.shape[:2]))
+        return detections
+
+    def _letterbox(self, region_name) -> Letterbox:
+        letterbox = self._letterboxes.get(region_name)
+        if letterbox is None or letterbox.size != self.imgsz:
+            letterbox = self._letterboxes[region_name] = Letterbox(self.imgsz)
+        return letterbox
+
+    def _detect_batched(self, crops) -> List[Dict[str, Any]]:
+        """Letterbox de todas as regiões para o mesmo tamanho e um único forward"""
+        batch, transforms = [], []
+        for region_name, roi, offset in crops:
+            boxed, scale, pad = self._letterbox(region_name)(roi)
+            batch.append(boxed)
+            transforms.append((region_name, scale, pad, offset, roi.shape[:2]))
+
+        outputs = self.model(batch, imgsz=self.imgsz, verbose=False)
+
+        detections = []
+        for det, (region_name, scale, pad, offset, shape) in zip(outputs, transforms):
+            detections.extend(self._decode(det, region_name, scale, pad, offset, shape))
+        return detections
+
+    def _decode(self, det, region_name, scale, pad, offset, shape=None) -> List[Dict[str, Any]]:
+        """Converte a saída de uma imagem para caixas no frame original"""
+        if det.boxes is None or len(det.boxes) == 0:
+            return []
+
+        cls_ids = det.boxes.cls.cpu().numpy().astype(np.int32)
+        confs = det.boxes.conf.cpu().numpy().astype(np.float32)
+        xyxy = det.boxes.xyxy.cpu().numpy().astype(np.float32)
+
+        keep = confs >= CONFIDENCE_THRESHOLD
+        if not keep.any():
+            return []
+
+        # Desfaz o letterbox e soma a posição da região no frame
+        xyxy = unletterbox_boxes(xyxy[keep], scale, pad, offset, shape)
+
+        names = self.model.names
+        return [
+            {
+                "region": region_name,
+                "name": names.get(int(cls_id), f"unknown_{cls_id}"),
+                "confidence": float(conf),
+                "bbox": box.tolist(),
+            }
+            for cls_id, conf, box in zip(cls_ids[keep], confs[keep], xyxy)
+        ]
+
     def is_available(self) -> bool:
         """Retorna True se o YOLO está disponível e carregado."""
         return self.model is not None